@@ -0,0 +1,363 @@
+"""
+Canvas helpers shared by the VisToole tools.
+
+There is only one instance of every helper per figure,
+use .of(fig) to get it.
+"""
+
+import time
+import numpy as np
+from matplotlib.legend import Legend
+from matplotlib.patches import Patch
+from matplotlib.text import Text
+
+
+class BlitLayer():
+    """
+    Artists of the figure redrawn over the cached background
+
+    Artists added to the layer are drawn as usual, in their zorder,
+    while nothing moves. Between begin() and end() - a drag, a live
+    stream - all of them are animated: the full draw skips them,
+    after every full draw (draw_event) the background is cached and
+    the layer is drawn on top of it - also by savefig,
+    update() restores the background and redraws only the layer.
+    Sessions may overlap, the layer is animated until the last one ends.
+    If the canvas can't blit, nothing is animated
+    and update() falls back to draw_idle().
+    """
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self._bg = None
+        self._artists = []
+        self._animated = {}    # artist: animated status before the session
+        self._sessions = 0
+        self._draw_ev_id = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    @classmethod
+    def of(cls, fig):
+        # kept by the figure, so it goes with the figure
+        layer = getattr(fig, '_vis_blit_layer', None)
+        if layer is None or layer.canvas is not fig.canvas:
+            layer = cls(fig)
+            fig._vis_blit_layer = layer
+        return layer
+
+    @property
+    def supported(self):
+        return getattr(self.canvas, 'supports_blit', False)
+
+    @property
+    def active(self):
+        """   True - a session is open, the layer is animated   """
+        return self._sessions > 0 and self.supported
+
+    @property
+    def artists(self):
+        return self._artists
+
+    def add(self, *artists):
+        """
+        returns only the artists that were not in the layer yet
+        """
+        new = [a for a in artists if a not in self._artists]
+        self._artists += new
+        if self.active:
+            self._animate(new)
+        return new
+
+    def remove(self, *artists):
+        gone = [a for a in artists if a in self._artists]
+        for a in gone:
+            self._artists.remove(a)
+        self._restore(gone)
+
+    def _animate(self, artists):
+        for a in artists:
+            self._animated[a] = a.get_animated()
+            a.set_animated(True)
+
+    def _restore(self, artists):
+        for a in artists:
+            if a in self._animated:
+                a.set_animated(self._animated.pop(a))
+
+    def begin(self, *artists):
+        """
+        a session - e.g. for the time of dragging, artists are its temporary members
+
+        Returns the artists really added, they should be passed to end().
+        Costs one full draw if the layer gets animated or something new comes into it.
+        """
+        self._sessions += 1
+        first = self._sessions == 1 and self.supported
+        if first:
+            self._animate(self._artists)
+        new = self.add(*artists)
+        if self.active and (first or new):
+            self.capture(hidden=self._artists if first else new)
+        return new
+
+    def end(self, artists):
+        """   ends the session begun with artists, the last one gives the layer back   """
+        self.remove(*artists)
+        self._sessions = max(self._sessions - 1, 0)
+        if not self._sessions:
+            self._restore(self._artists)
+        self.canvas.draw_idle()
+
+    def capture(self, hidden=()):
+        """
+        full draw and a new background
+
+        'hidden' artists are also hidden for this draw, because
+        some parents (e.g. axis labels) draw their children even if animated
+        """
+        vis = [a.get_visible() for a in hidden]
+        for a in hidden:
+            a.set_visible(False)
+        self.canvas.draw()
+        for a, v in zip(hidden, vis):
+            a.set_visible(v)
+        self.update()
+
+    def _on_draw(self, event):
+        if not self.active:
+            return    # the full draw has drawn the layer
+        # savefig draws with its own canvas (pdf, svg) or dpi -
+        # the layer goes there too, but it's not the background to cache
+        if event.canvas is self.canvas and not self.canvas.is_saving():
+            self._bg = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated(event.renderer)
+
+    def _draw_animated(self, renderer=None):
+        # like the full draw - in zorder, stable for equal ones
+        for a in sorted(self._artists, key=lambda a: a.get_zorder()):
+            if a.get_visible() and a.get_figure() is not None:
+                if renderer is None:
+                    self.fig.draw_artist(a)
+                else:
+                    a.draw(renderer)
+
+    def update(self):
+        if not self.active or self._bg is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+
+
+class DragScheduler():
+    """
+    Motion events coalescing for one drag
+
+    Only the latest motion event is kept and handled
+    at most max_rate times per second - the rest waits for the timer.
+    flush() handles the pending event at once, e.g. on button release.
+    max_rate = 0 or None - every event is handled immediately.
+    """
+
+    max_rate = 60    # Hz, default for every drag
+
+    def __init__(self, canvas, func, max_rate=None):
+        self.canvas = canvas
+        self.func = func
+        self.rate = DragScheduler.max_rate if max_rate is None else max_rate
+        self._pending = None
+        self._last = 0.
+        self._timer = None
+        self._waiting = False
+
+    def push(self, event):
+        self._pending = event
+        if not self.rate:
+            self.flush()
+            return
+        wait = self._last + 1. / self.rate - time.perf_counter()
+        if wait <= 0:
+            self.flush()
+        elif not self._waiting:
+            self._start_timer(wait)
+
+    def _start_timer(self, wait):
+        if self._timer is None:
+            self._timer = self.canvas.new_timer()
+            self._timer.single_shot = True
+            self._timer.add_callback(self._on_timer)
+        self._timer.interval = max(1, int(wait * 1000 + 0.5))   # ms
+        self._waiting = True
+        self._timer.start()
+
+    def _on_timer(self):
+        self._waiting = False
+        self.flush()
+
+    def flush(self):
+        if self._waiting:
+            self._timer.stop()
+            self._waiting = False
+        event = self._pending
+        self._pending = None
+        if event is not None:
+            self._last = time.perf_counter()
+            self.func(event)
+
+    def cancel(self):
+        if self._waiting:
+            self._timer.stop()
+            self._waiting = False
+        self._pending = None
+
+
+class EventRouter():
+    """
+    One mpl_connect per event type for the whole figure
+
+    Handlers are kept in a map keyed by what the event is about:
+        'pick_event'         - event.artist
+        'button_press_event' - event.button
+        'key_press_event'    - event.key
+    so every event goes straight to its owners, no matter
+    how many tools live in the figure.
+    """
+
+    _route_keys = {'pick_event':         lambda event: event.artist,
+                   'button_press_event': lambda event: event.button,
+                   'key_press_event':    lambda event: event.key}
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self._routes = {}    # event name: {route key: [func, ...]}
+        self._mpl_ids = {}   # event name: mpl cid
+        self._handlers = {}  # cid: (event name, route keys, func)
+        self._cid = 0
+
+    @classmethod
+    def of(cls, fig):
+        # kept by the figure, so it goes with the figure
+        router = getattr(fig, '_vis_event_router', None)
+        if router is None or router.canvas is not fig.canvas:
+            router = cls(fig)
+            fig._vis_event_router = router
+        return router
+
+    def connect(self, name, func, *keys):
+        """
+        keys - artists, mouse buttons or keys to route to func
+
+        no keys - func gets every event of this type
+        returns cid for disconnect()
+        """
+        if name not in self._route_keys:
+            raise ValueError("'%s' can't be routed" % name)
+        if name not in self._mpl_ids:
+            self._routes[name] = {}
+            self._mpl_ids[name] = self.canvas.mpl_connect(name, self._process)
+        keys = keys if len(keys) > 0 else (None,)
+        for k in keys:
+            self._routes[name].setdefault(k, []).append(func)
+        self._cid += 1
+        self._handlers[self._cid] = (name, keys, func)
+        return self._cid
+
+    def disconnect(self, cid):
+        if cid not in self._handlers:
+            return
+        name, keys, func = self._handlers.pop(cid)
+        routes = self._routes[name]
+        for k in keys:
+            routes[k].remove(func)
+            if len(routes[k]) == 0:
+                routes.pop(k)
+
+    def _process(self, event):
+        routes = self._routes[event.name]
+        funcs = routes.get(self._route_keys[event.name](event), [])
+        for func in funcs + routes.get(None, []):
+            func(event)
+
+
+class ExtentIndex():
+    """
+    Grid of display extents of everything that is not 'empty space'
+
+    axes, figure children, titles, axis and tick labels, texts,
+    patches and legends of every axes, plus registered artists.
+    Extents are computed only once after every draw_event or resize_event,
+    so 'is this click on empty space' is a look into one grid cell.
+    Visibility is checked at query time - of the artist and of its axes
+    (and axis for tick labels), so a hidden panel hides its labels too.
+    """
+
+    cell = 64   # px
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self._extra = []
+        self._grid = {}     # (i, j): [(artist, bbox, owners), ...]
+        self._dirty = True
+        self._draw_ev_id = self.canvas.mpl_connect('draw_event', self.invalidate)
+        self._resize_ev_id = self.canvas.mpl_connect('resize_event', self.invalidate)
+
+    @classmethod
+    def of(cls, fig):
+        # kept by the figure, so it goes with the figure
+        index = getattr(fig, '_vis_extent_index', None)
+        if index is None or index.canvas is not fig.canvas:
+            index = cls(fig)
+            fig._vis_extent_index = index
+        return index
+
+    def register(self, *artists):
+        """   artists that are not found in the figure structure   """
+        self._extra += [a for a in artists if a not in self._extra]
+        self._dirty = True
+
+    def invalidate(self, event=None):
+        self._dirty = True
+
+    def _artists(self):
+        """   [(artist, its owners - hidden with them), ...]   """
+        # first child is figure rectangle creating itself
+        zz = [(a, (a.axes,) if a.axes not in (None, a) else ())
+              for a in self.fig.get_children()[1:] + self._extra]
+        for ax in self.fig.axes:
+            zz += [(c, (ax,)) for c in ax.get_children()
+                   if isinstance(c, (Text, Patch, Legend)) and c is not ax.patch]
+            for axis, labels in ((ax.xaxis, ax.get_xticklabels()),
+                                 (ax.yaxis, ax.get_yticklabels())):
+                zz += [(a, (ax, axis)) for a in [axis.get_label()] + labels]
+        return zz
+
+    def _rebuild(self):
+        self._grid = {}
+        c = self.cell
+        for a, owners in self._artists():
+            try:
+                bbox = a.get_window_extent()
+            except Exception:    # no renderer yet or not drawable
+                continue
+            if not np.all(np.isfinite(bbox.get_points())):
+                continue
+            for i in range(int(bbox.x0 // c), int(bbox.x1 // c) + 1):
+                for j in range(int(bbox.y0 // c), int(bbox.y1 // c) + 1):
+                    self._grid.setdefault((i, j), []).append((a, bbox, owners))
+        self._dirty = False
+
+    def hit(self, x, y):
+        """   first visible artist containing display point (x, y) or None   """
+        if self._dirty:
+            self._rebuild()
+        for a, bbox, owners in self._grid.get((int(x // self.cell), int(y // self.cell)), []):
+            if bbox.contains(x, y) and a.get_visible() and \
+               all(o.get_visible() for o in owners):
+                return a
+        return None
+
+    def is_empty(self, x, y):
+        return self.hit(x, y) is None
@@ -0,0 +1,263 @@
+"""
+Legends of many lines for LegView.
+
+LegendFocus - styles of all the legend items in arrays,
+a focus change is one batch of only the artists really changed.
+
+LegendPager - the legend shows only a page of the items,
+the rest is scrolled in with the mouse wheel.
+
+LegendIndex - the items by name, by artist, by regex, by the words
+of the names, tags and groups - hash lookups, query() for all of them.
+"""
+
+import re
+from bisect import bisect_left
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.text import Text
+
+
+class LegendFocus():
+    """
+    Focus styles of the legend items
+
+    Item i - (ax_line, leg_line, leg_label), its styles are kept
+    in arrays, one per LegView style key:
+        ax_la - ax_line alpha      ax_lw - ax_line linewidth
+        ax_zr - ax_line zorder     lg_la - leg_line alpha
+        lg_ba - leg_label alpha
+    set() changes only the arrays, for any number of items at once,
+    apply() calls the artists setters for the values different
+    from the applied ones - so a focus change costs the artists that
+    really change, and the caller draws once after it.
+    """
+
+    keys = ('ax_la', 'ax_lw', 'ax_zr', 'lg_la', 'lg_ba')
+
+    # key: (item artist, setter)
+    _setters = {'ax_la': (0, 'set_alpha'),
+                'ax_lw': (0, 'set_linewidth'),
+                'ax_zr': (0, 'set_zorder'),
+                'lg_la': (1, 'set_alpha'),
+                'lg_ba': (2, 'set_alpha')}
+
+    def __init__(self, items):
+        self.items = list(items)
+        n = len(self.items)
+        self.style = {k: np.full(n, np.nan) for k in self.keys}
+        self._applied = {k: np.full(n, np.nan) for k in self.keys}
+        getters = {'set_alpha': 'get_alpha', 'set_linewidth': 'get_linewidth',
+                   'set_zorder': 'get_zorder'}
+        for k in self.keys:
+            a, setter = self._setters[k]
+            for i, item in enumerate(self.items):
+                v = getattr(item[a], getters[setter])()
+                self._applied[k][i] = np.nan if v is None else v
+            self.style[k][:] = self._applied[k]
+
+    def __len__(self):
+        return len(self.items)
+
+    def set(self, idx, style, keys=None):
+        """
+        idx - item index, indexes or slice, style - dict like LegView.active
+
+        keys - only these keys of style, None - all of them
+        """
+        for k in style if keys is None else keys:
+            self.style[k][idx] = style[k]
+
+    def is_set(self, i, style, key):
+        return self.style[key][i] == style[key]
+
+    def apply(self):
+        """   returns the number of setter calls   """
+        calls = 0
+        for k in self.keys:
+            want, done = self.style[k], self._applied[k]
+            # nan - never set, not applied
+            changed = np.flatnonzero((want != done) & ~np.isnan(want))
+            a, setter = self._setters[k]
+            for i in changed:
+                getattr(self.items[i][a], setter)(float(want[i]))
+            done[changed] = want[changed]
+            calls += len(changed)
+        return calls
+
+
+class LegendPager():
+    """
+    Legend of a page of items only - constant layout for any number of lines
+
+    The legend has 'page' entries - slots. Every item has a proxy
+    leg_line and leg_label, never drawn, so focus and mute of the items
+    off the page are kept by them as for the shown ones.
+    show(first) gives the slots the names, the styles of the ax_lines
+    and the proxies alphas of the items from 'first' on.
+    legend - made of the first page of ax_lines and names.
+    """
+
+    def __init__(self, legend, ax_lines, names):
+        self.legend = legend
+        self.ax_lines = list(ax_lines)
+        self.slot_lines = legend.get_lines()
+        self.slot_labels = legend.get_texts()
+        self.page = len(self.slot_labels)
+        # only alpha of leg_lines is kept, plain artists are enough
+        self.leg_lines = [Artist() for _ in self.ax_lines]
+        self.leg_labels = [Text(text=name) for name in names]
+        self._item = {}      # slot_label: item index
+        self.first = 0
+        self.show(0)
+
+    def __len__(self):
+        return len(self.ax_lines)
+
+    def item_of(self, slot_label):
+        """   index of the item shown in the slot, None - not a slot   """
+        return self._item.get(slot_label)
+
+    def show(self, first):
+        first = int(max(min(first, len(self) - self.page), 0))
+        self.first = first
+        self._item = {}
+        for s, (line, label) in enumerate(zip(self.slot_lines, self.slot_labels)):
+            i = first + s
+            # like the legend handler, only transform and markevery stay
+            trans, every = line.get_transform(), line.get_markevery()
+            line.update_from(self.ax_lines[i])
+            line.set_transform(trans)
+            line.set_markevery(every)
+            line.set_markersize(line.get_markersize() * self.legend.markerscale)
+            line.set_clip_box(None)
+            line.set_clip_path(None)
+            label.set_text(self.leg_labels[i].get_text())
+            self._item[label] = i
+        self.sync()
+        return first
+
+    def scroll(self, pages):
+        return self.show(self.first + int(round(pages * self.page)))
+
+    def sync(self):
+        """   proxies alphas to the slots   """
+        for s, (line, label) in enumerate(zip(self.slot_lines, self.slot_labels)):
+            line.set_alpha(self.leg_lines[self.first + s].get_alpha())
+            label.set_alpha(self.leg_labels[self.first + s].get_alpha())
+
+
+class LegendIndex():
+    """
+    Legend items by name and by artist
+
+    names - label: [item indexes], labels may repeat
+    artists - any artist of an item record: item index
+    lookup(*keys) - indexes for positions, labels, artists and
+    compiled regex patterns, in the order of keys, one dict look
+    per key - so thousands of names at once cost nothing.
+    Patterns go over the distinct labels once, the result is kept.
+
+    tokens - inverted index: word of the labels (lower case, split
+    on everything but letters and digits): item indexes,
+    tags, groups - tag or group name: item indexes.
+    query() - items of the words, word prefixes, tags, groups
+    and regex, see there.
+    """
+
+    def __init__(self, records, names):
+        self.names = {}
+        self.artists = {}
+        self.labels = list(names)
+        for i, (record, name) in enumerate(zip(records, self.labels)):
+            self.names.setdefault(name, []).append(i)
+            for a in record:
+                self.artists[a] = i
+        self.tokens = {}
+        for i, name in enumerate(self.labels):
+            for tok in set(self.split(name)):
+                self.tokens.setdefault(tok, []).append(i)
+        self._words = sorted(self.tokens)     # prefixes by bisect
+        self.tags = {}
+        self.groups = {}
+        self._found = {}     # pattern: indexes
+
+    @staticmethod
+    def split(name):
+        return [t for t in re.split(r'[\W_]+', name.lower()) if t]
+
+    def tag(self, tag, idx):
+        self.tags[tag] = sorted(set(self.tags.get(tag, [])) | set(idx))
+
+    def group(self, group, idx):
+        self.groups[group] = list(idx)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def match(self, pattern):
+        """   indexes of the labels where pattern (str or compiled) is found   """
+        found = self._found.get(pattern)
+        if found is None:
+            search = re.compile(pattern).search
+            found = sorted(i for name, idx in self.names.items()
+                           if search(name) for i in idx)
+            self._found[pattern] = found
+        return found
+
+    def lookup(self, *keys):
+        idx = []
+        for k in keys:
+            if isinstance(k, (int, np.integer)):
+                idx.append(range(len(self))[k])
+            elif isinstance(k, str):
+                idx += self.names.get(k, [])
+            elif isinstance(k, re.Pattern):
+                idx += self.match(k)
+            elif k in self.artists:
+                idx.append(self.artists[k])
+        return idx
+
+    def _prefixed(self, prefix):
+        found = set()
+        k = bisect_left(self._words, prefix)
+        while k < len(self._words) and self._words[k].startswith(prefix):
+            found.update(self.tokens[self._words[k]])
+            k += 1
+        return found
+
+    def _term(self, term):
+        if term[0] == '#':
+            return set(self.tags.get(term[1:], ()))
+        if term[0] == '@':
+            return set(self.groups.get(term[1:], ()))
+        if len(term) > 2 and term[0] == '/' and term[-1] == '/':
+            return set(self.match(term[1:-1]))
+        term = term.lower()
+        if term.endswith('*'):
+            return self._prefixed(term[:-1])
+        return set(self.tokens.get(term, ()))
+
+    def query(self, text):
+        """
+        item indexes of the query, sorted
+
+        terms:  word - a word of the label,  word* - a word beginning,
+                #tag,  @group,  /regex/ - over the whole label
+        space - items of all the terms, comma - of any of the parts
+        e.g. 'i* phase, #bus1' - words beginning with 'i' and 'phase'
+        or tagged 'bus1'. Regex here can't have spaces and commas -
+        compiled patterns go to lookup().
+        """
+        found = set()
+        for part in text.split(','):
+            terms = part.split()
+            if len(terms) == 0:
+                continue
+            hit = self._term(terms[0])
+            for t in terms[1:]:
+                if not hit:
+                    break
+                hit &= self._term(t)
+            found |= hit
+        return sorted(found)
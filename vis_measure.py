@@ -0,0 +1,820 @@
+"""
+Measurements of the line data between cursors.
+
+Every structure is built once per data version of the line,
+then any cursor window is answered without touching the samples.
+Windows are given by sample indices [i1, i2) - i2 is not included.
+"""
+
+import collections
+import threading
+import weakref
+import numpy as np
+
+
+class IndexMapper():
+    """
+    x position (e.g. of a cursor) -> sample index
+
+    Uniformly sampled x - the index is computed, O(1),
+    and corrected by the neighbouring samples, so the result
+    is always the same as np.searchsorted gives.
+    Other sorted x - np.searchsorted, O(log n).
+    Unsorted x - a scan, O(n).
+
+    IndexMapper.of(line) - one cached mapper per line and its x data
+    """
+
+    _mappers = weakref.WeakKeyDictionary()    # line: (x orig, mapper)
+
+    rtol = 1e-6    # allowed jitter of the uniform step
+
+    def __init__(self, x, flags=None):
+        """   flags - (sorted, uniform) if they are already known   """
+        self.x = np.asarray(x, dtype=float)
+        self.n = len(self.x)
+        self.uniform = False
+        self.sorted = True
+        if self.n < 2:
+            return
+        self.x0 = self.x[0]
+        self.dx = (self.x[-1] - self.x[0]) / (self.n - 1)
+        if flags is not None:
+            self.sorted, self.uniform = flags
+        else:
+            self.sorted, self.uniform = self.flags(self.x, self.dx)
+
+    @classmethod
+    def flags(cls, x, dx):
+        d = np.diff(x)
+        uniform = dx > 0 and bool(np.abs(d - dx).max() <= cls.rtol * dx)
+        return bool(np.all(d >= 0)), uniform
+
+    @classmethod
+    def of(cls, line):
+        xo = line.get_xdata(orig=True)
+        cached = cls._mappers.get(line)
+        if cached is None or cached[0] is not xo:
+            cached = (xo, cls(xo))
+            cls._mappers[line] = cached
+        return cached[1]
+
+    @classmethod
+    def install(cls, line, xo, mapper):
+        """   mapper built elsewhere (StructureBuilder) for the x data xo of the line   """
+        cls._mappers[line] = (xo, mapper)
+
+    def _grid(self, v, i, strict):
+        """   i - the guess, moved to the first x[i] >= v (> v if strict)   """
+        x, n = self.x, self.n
+        i = min(max(i, 0), n)
+        if strict:
+            while i > 0 and x[i-1] > v:
+                i -= 1
+            while i < n and x[i] <= v:
+                i += 1
+        else:
+            while i > 0 and x[i-1] >= v:
+                i -= 1
+            while i < n and x[i] < v:
+                i += 1
+        return i
+
+    def left(self, v):
+        """   first i with x[i] >= v   """
+        if self.uniform:
+            return self._grid(v, int(np.ceil((v - self.x0) / self.dx)), False)
+        if self.sorted:
+            return int(np.searchsorted(self.x, v, side='left'))
+        idx = np.flatnonzero(self.x >= v)
+        return int(idx[0]) if len(idx) > 0 else self.n
+
+    def right(self, v):
+        """   first i with x[i] > v, i.e. one past the last x[i] <= v   """
+        if self.uniform:
+            return self._grid(v, int(np.floor((v - self.x0) / self.dx)) + 1, True)
+        if self.sorted:
+            return int(np.searchsorted(self.x, v, side='right'))
+        idx = np.flatnonzero(self.x <= v)
+        return int(idx[-1]) + 1 if len(idx) > 0 else 0
+
+    def window(self, x1, x2):
+        """   [i1, i2) of the samples with x1 <= x <= x2   """
+        if x1 > x2:
+            x1, x2 = x2, x1
+        return self.left(x1), self.right(x2)
+
+    def nearest(self, v):
+        i = self.left(v)
+        if i >= self.n:
+            return self.n - 1
+        if i > 0 and v - self.x[i-1] < self.x[i] - v:
+            return i - 1
+        return i
+
+
+class RangeMinMax():
+    """
+    Min/max pyramid for range queries in O(log n)
+
+    Level k keeps min, max and their sample indices for blocks
+    of 2**k samples - n extra values in total, not n·log(n)
+    like the sparse table. A range is covered by at most
+    two blocks per level, bottom-up as in a segment tree.
+
+    RangeMinMax.of(line) - one cached pyramid per line and its y data,
+    shared by the measurements and the drawing (LineLOD)
+    """
+
+    _pyramids = weakref.WeakKeyDictionary()    # line: (y orig, pyramid)
+
+    def __init__(self, y, levels=None):
+        """   levels - [(min, max, argmin, argmax), ...] if already built   """
+        y = np.asarray(y, dtype=float)
+        self.n = len(y)
+        # level 0 - the samples themselves, indices are implicit
+        self._levels = [(y, y, None, None)]
+        if levels is not None:
+            self._levels += levels
+            return
+        mn, mx = y, y
+        amn = amx = np.arange(self.n)
+        while len(mn) > 1:
+            if len(mn) % 2:    # the odd last block is paired with itself
+                mn, mx = np.append(mn, mn[-1]), np.append(mx, mx[-1])
+                amn, amx = np.append(amn, amn[-1]), np.append(amx, amx[-1])
+            m = len(mn) // 2
+            mn2, mx2 = mn.reshape(m, 2), mx.reshape(m, 2)
+            amn2, amx2 = amn.reshape(m, 2), amx.reshape(m, 2)
+            right_mn = mn2[:, 1] < mn2[:, 0]
+            right_mx = mx2[:, 1] > mx2[:, 0]
+            mn = np.where(right_mn, mn2[:, 1], mn2[:, 0])
+            mx = np.where(right_mx, mx2[:, 1], mx2[:, 0])
+            amn = np.where(right_mn, amn2[:, 1], amn2[:, 0])
+            amx = np.where(right_mx, amx2[:, 1], amx2[:, 0])
+            self._levels.append((mn, mx, amn, amx))
+
+    @property
+    def depth(self):
+        return len(self._levels)
+
+    def level(self, k):
+        """   (min, max, argmin, argmax) of the blocks of 2**k samples, k >= 1   """
+        return self._levels[k]
+
+    @classmethod
+    def cached(cls, line):
+        """   the pyramid of the current line data if it's built, else None   """
+        cached = cls._pyramids.get(line)
+        if cached is None or cached[0] is not line.get_ydata(orig=True):
+            return None
+        return cached[1]
+
+    @classmethod
+    def of(cls, line):
+        yo = line.get_ydata(orig=True)
+        cached = cls._pyramids.get(line)
+        if cached is None or cached[0] is not yo:
+            cached = (yo, cls(yo))
+            cls._pyramids[line] = cached
+        return cached[1]
+
+    @classmethod
+    def install(cls, line, yo, pyramid):
+        """   pyramid built elsewhere (StructureBuilder) for the y data yo of the line   """
+        cls._pyramids[line] = (yo, pyramid)
+
+    def query(self, i1, i2):
+        """   (min, max, argmin, argmax) of [i1, i2)   """
+        i1 = max(0, int(i1))
+        i2 = min(self.n, int(i2))
+        if i2 <= i1:
+            raise ValueError("empty window [%d, %d)" % (i1, i2))
+        vmin, vmax = np.inf, -np.inf
+        imin = imax = i1
+        lo, hi = i1, i2
+        for mn, mx, amn, amx in self._levels:
+            if lo >= hi:
+                break
+            blocks = []
+            if lo & 1:
+                blocks.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                blocks.append(hi)
+            for j in blocks:
+                if mn[j] < vmin:
+                    vmin = mn[j]
+                    imin = j if amn is None else amn[j]
+                if mx[j] > vmax:
+                    vmax = mx[j]
+                    imax = j if amx is None else amx[j]
+            lo >>= 1
+            hi >>= 1
+        return vmin, vmax, int(imin), int(imax)
+
+
+def _cum(a):
+    """   cumulative sum with leading 0 - sum(a[i1:i2]) = c[i2] - c[i1]   """
+    c = np.empty(len(a) + 1)
+    c[0] = 0.
+    np.cumsum(a, out=c[1:])
+    return c
+
+
+sum_names = ('sy', 'syy', 'sx', 'sxy', 'sxx', 'trap')
+
+
+def line_sums(x, y, out=None):
+    """
+    cumulative sums of LineMeasure, x and y shifted by the first samples
+
+    out - dict of arrays to fill (n+1 long, trap n long)
+    """
+    x0 = x[0] if len(x) > 0 else 0.
+    y0 = y[0] if len(y) > 0 else 0.
+    xs = x - x0
+    ys = y - y0
+    out = {} if out is None else out
+    for k, a in (('sy', ys), ('syy', ys * ys), ('sx', xs),
+                 ('sxy', xs * ys), ('sxx', xs * xs),
+                 # trap[k] - integral from sample 0 to sample k
+                 ('trap', (y[1:] + y[:-1]) * np.diff(x) / 2.)):
+        c = _cum(a)
+        if k in out:
+            out[k][:] = c
+        else:
+            out[k] = c
+    return out
+
+
+class LineMeasure():
+    """
+    Windowed statistics of one Line2D in O(1)
+
+    Cumulative sums Σy, Σy², Σx, Σxy, Σx² and the cumulative trapezoid
+    are computed once per data version (set_data on the line).
+    x and y are shifted by their first samples before summing,
+    so long signals with big offsets don't lose the precision.
+
+    legV.measure(item).stats(*legV.measure(item).window(x1, x2))
+
+    LineMeasure.of(line) - one cached measure per line
+    """
+
+    def __init__(self, line, sums=None):
+        """   sums - line_sums() of the current line data if already computed   """
+        self.line = line
+        self._xorig = None
+        self._yorig = None
+        self.version = 0
+        self._sliding = None
+        self.update(sums)
+
+    @classmethod
+    def of(cls, line):
+        # kept by the line, so it goes with the line and its sums
+        meas = getattr(line, '_vis_measure', None)
+        if meas is None:
+            meas = cls(line)
+            line._vis_measure = meas
+        return meas
+
+    def update(self, sums=None):
+        """
+        rebuilds the sums if the line data has changed
+
+        returns True if they were rebuilt
+        """
+        xo = self.line.get_xdata(orig=True)
+        yo = self.line.get_ydata(orig=True)
+        if xo is self._xorig and yo is self._yorig:
+            return False
+        self._xorig = xo
+        self._yorig = yo
+        self._build(np.asarray(xo, dtype=float), np.asarray(yo, dtype=float), sums)
+        self.version += 1
+        return True
+
+    def _build(self, x, y, sums=None):
+        self.x = x
+        self.y = y
+        self.x0 = x[0] if len(x) > 0 else 0.
+        self.y0 = y[0] if len(y) > 0 else 0.
+        if sums is None:
+            sums = line_sums(x, y)
+        for k in sum_names:
+            setattr(self, '_' + k, sums[k])
+        self._xings = {}     # (level, slope): sorted crossing x
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def mapper(self):
+        return IndexMapper.of(self.line)
+
+    def window(self, x1, x2):
+        """   [i1, i2) of the samples with x1 <= x <= x2   """
+        return self.mapper.window(x1, x2)
+
+    def _check(self, i1, i2):
+        self.update()
+        i1 = max(0, int(i1))
+        i2 = min(len(self.y), int(i2))
+        if i2 <= i1:
+            raise ValueError("empty window [%d, %d)" % (i1, i2))
+        return i1, i2
+
+    def count(self, i1, i2):
+        i1, i2 = self._check(i1, i2)
+        return i2 - i1
+
+    def mean(self, i1, i2):
+        i1, i2 = self._check(i1, i2)
+        return (self._sy[i2] - self._sy[i1]) / (i2 - i1) + self.y0
+
+    def rms(self, i1, i2):
+        i1, i2 = self._check(i1, i2)
+        n = i2 - i1
+        s1 = self._sy[i2] - self._sy[i1]
+        s2 = self._syy[i2] - self._syy[i1]
+        # Σ(ys + y0)² = Σys² + 2·y0·Σys + n·y0²
+        ms = (s2 + 2. * self.y0 * s1 + n * self.y0 ** 2) / n
+        return np.sqrt(max(ms, 0.))
+
+    def std(self, i1, i2):
+        """   rms of the AC part - population std   """
+        i1, i2 = self._check(i1, i2)
+        n = i2 - i1
+        m = (self._sy[i2] - self._sy[i1]) / n
+        var = (self._syy[i2] - self._syy[i1]) / n - m * m
+        return np.sqrt(max(var, 0.))
+
+    def integral(self, i1, i2):
+        """   trapezoid from sample i1 to sample i2-1   """
+        i1, i2 = self._check(i1, i2)
+        return self._trap[i2 - 1] - self._trap[i1]
+
+    def lin_fit(self, i1, i2):
+        """   least squares y = a·x + b, returns (a, b)   """
+        i1, i2 = self._check(i1, i2)
+        n = i2 - i1
+        sx = self._sx[i2] - self._sx[i1]
+        sy = self._sy[i2] - self._sy[i1]
+        sxx = self._sxx[i2] - self._sxx[i1]
+        sxy = self._sxy[i2] - self._sxy[i1]
+        den = n * sxx - sx * sx
+        if den == 0:
+            return 0., sy / n + self.y0
+        a = (n * sxy - sx * sy) / den
+        b = (sy - a * sx) / n
+        # back from the shifted coordinates
+        return a, b + self.y0 - a * self.x0
+
+    @property
+    def range_minmax(self):
+        self.update()
+        return RangeMinMax.of(self.line)
+
+    @property
+    def sliding(self):
+        """   SlidingStats of this line, for windows moving by a few samples   """
+        if self._sliding is None:
+            self._sliding = SlidingStats(self)
+        return self._sliding
+
+    def min_max(self, i1, i2):
+        return self.range_minmax.query(i1, i2)[:2]
+
+    def argmin(self, i1, i2):
+        return self.range_minmax.query(i1, i2)[2]
+
+    def argmax(self, i1, i2):
+        return self.range_minmax.query(i1, i2)[3]
+
+    def pik_pik(self, i1, i2):
+        vmin, vmax = self.min_max(i1, i2)
+        return vmax - vmin
+
+    def value_at(self, x):
+        """   y at x, linear between samples   """
+        self.update()
+        i = min(max(self.mapper.left(x), 1), len(self.y) - 1)
+        x0, x1 = self.x[i-1], self.x[i]
+        if x1 == x0:
+            return self.y[i]
+        return self.y[i-1] + (x - x0) / (x1 - x0) * (self.y[i] - self.y[i-1])
+
+    xings_cache = 16    # levels kept per line
+
+    def crossings(self, level, slope='rising'):
+        """
+        sorted x of the level crossings, interpolated between samples
+
+        slope - 'rising', 'falling' or 'both'
+        Kept per level, so a new x window is only a searchsorted.
+        """
+        self.update()
+        key = (float(level), slope)
+        if key not in self._xings:
+            if len(self._xings) >= self.xings_cache:
+                self._xings.pop(next(iter(self._xings)))   # the oldest one
+            self._xings[key] = self._find_crossings(float(level), slope)
+        return self._xings[key]
+
+    def crossings_between(self, level, x1, x2, slope='rising'):
+        t = self.crossings(level, slope)
+        if x1 > x2:
+            x1, x2 = x2, x1
+        return t[np.searchsorted(t, x1, side='left'):
+                 np.searchsorted(t, x2, side='right')]
+
+    def next_crossings(self, level, x, count=2, slope='rising'):
+        """   first 'count' crossings at or after x - e.g. one period   """
+        t = self.crossings(level, slope)
+        i = np.searchsorted(t, x, side='left')
+        return t[i:i+count]
+
+    _xing_block = 8     # pyramid level used to skip samples, 2**8 = 256
+
+    def _straddles(self, level):
+        """
+        sample pairs (i, i+1) that may cross the level
+
+        Blocks whose min/max don't hold the level are skipped
+        without looking at their samples, pairs across block
+        borders are checked separately.
+        """
+        n = len(self.y)
+        k = self._xing_block
+        B = 2 ** k
+        if n <= 4 * B:
+            return np.arange(n - 1)
+        mn, mx = self.range_minmax._levels[k][:2]
+        inside = np.flatnonzero((mn <= level) & (mx >= level))
+        inner = (inside[:, None] * B + np.arange(B - 1)).ravel()
+        inner = inner[inner < n - 1]
+        b = np.arange(B - 1, n - 1, B)
+        yb0, yb1 = self.y[b], self.y[b+1]
+        border = b[(np.minimum(yb0, yb1) <= level) & (np.maximum(yb0, yb1) >= level)]
+        return np.sort(np.concatenate((inner, border)))
+
+    def _find_crossings(self, level, slope):
+        if len(self.y) < 2:
+            return np.empty(0)
+        i = self._straddles(level)
+        y0, y1 = self.y[i], self.y[i+1]
+        rising = (y0 < level) & (y1 >= level)
+        falling = (y0 > level) & (y1 <= level)
+        if slope == 'rising':
+            keep = rising
+        elif slope == 'falling':
+            keep = falling
+        elif slope == 'both':
+            keep = rising | falling
+        else:
+            raise ValueError("slope should be 'rising', 'falling' or 'both'")
+        i, y0, y1 = i[keep], y0[keep], y1[keep]
+        t = self.x[i] + (level - y0) / (y1 - y0) * (self.x[i+1] - self.x[i])
+        return np.sort(t)
+
+    def stats(self, i1, i2):
+        i1, i2 = self._check(i1, i2)
+        return dict(n=i2 - i1,
+                    mean=self.mean(i1, i2),
+                    rms=self.rms(i1, i2),
+                    std=self.std(i1, i2),
+                    integral=self.integral(i1, i2),
+                    lin_fit=self.lin_fit(i1, i2))
+
+
+def fast_len(n):
+    """   the smallest 2**a·3**b·5**c >= n - a fast FFT length   """
+    if n <= 6:
+        return max(int(n), 1)
+    best = 1 << (int(n) - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            q = -(-n // p35)                # ceil(n / p35)
+            cand = (1 << (q - 1).bit_length()) * p35
+            if cand < best:
+                best = cand
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+class Spectrum():
+    """
+    Amplitude spectrum in dB of a window of line samples
+
+    Samples are zero-padded to a fast FFT length.
+    Window arrays and results are cached, so the same window
+    of the same line data is never computed twice.
+    fft() may be called from a worker thread, prepare() can't.
+    """
+
+    windows = dict(rect=np.ones, hann=np.hanning, hamming=np.hamming,
+                   blackman=np.blackman, bartlett=np.bartlett)
+
+    cache = 32    # results kept
+    floor = 1e-12
+
+    def __init__(self, window='hann', pad=True):
+        self.pad = pad
+        self.set_window(window)
+        self._win = {}    # n: (window array, its sum)
+        self._res = {}    # key: (f, db)
+        self._lock = threading.Lock()
+
+    def set_window(self, window):
+        if window not in self.windows:
+            raise ValueError("window should be one of %s" % list(self.windows))
+        self.window = window
+
+    def get_window(self, n):
+        key = (self.window, n)
+        with self._lock:
+            w = self._win.get(key)
+        if w is None:
+            w = self.windows[self.window](n)
+            w = (w, w.sum())
+            with self._lock:
+                if len(self._win) >= self.cache:
+                    self._win.pop(next(iter(self._win)))
+                self._win[key] = w
+        return w
+
+    def key(self, meas, i1, i2):
+        return (id(meas), meas.version, int(i1), int(i2), self.window, self.pad)
+
+    def cached(self, meas, i1, i2):
+        with self._lock:
+            return self._res.get(self.key(meas, i1, i2))
+
+    def prepare(self, meas, i1, i2):
+        """   (key, samples, dx) of [i1, i2) of LineMeasure meas   """
+        i1, i2 = meas._check(i1, i2)
+        y = meas.y[i1:i2]
+        n = len(y)
+        dx = (meas.x[i2-1] - meas.x[i1]) / (n - 1) if n > 1 else 1.
+        return self.key(meas, i1, i2), y, dx
+
+    def compute(self, meas, i1, i2):
+        """   (f, dB) of the samples [i1, i2) of LineMeasure meas   """
+        return self.fft(*self.prepare(meas, i1, i2))
+
+    def fft(self, key, y, dx):
+        with self._lock:
+            res = self._res.get(key)
+        if res is not None:
+            return res
+        n = len(y)
+        w, wsum = self.get_window(n)
+        nfft = fast_len(n) if self.pad else n
+        amp = np.abs(np.fft.rfft(y * w, n=nfft)) * 2. / wsum
+        amp[0] /= 2.                        # DC has no mirror
+        db = 20. * np.log10(np.maximum(amp, self.floor))
+        res = (np.fft.rfftfreq(nfft, d=dx), db)
+        with self._lock:
+            if len(self._res) >= self.cache:
+                self._res.pop(next(iter(self._res)))
+            self._res[key] = res
+        return res
+
+
+class WindowHistogram():
+    """
+    Histogram of the samples [i1, i2) of LineMeasure with fixed bin edges
+
+    Edges span the whole line (or 'range'). The bin of every sample
+    is found once per data version, then moving the window only adds
+    the samples that entered it and subtracts the ones that left it
+    (bincount over the delta), so the cost depends on the cursor move,
+    not on the window width.
+    Samples out of 'range' are counted in under/overflow only.
+    """
+
+    def __init__(self, meas, bins=64, range=None):
+        self.meas = meas
+        self.bins = bins
+        self.range = range
+        self._version = None
+        self.i1 = self.i2 = 0
+
+    def _build(self):
+        y = self.meas.y
+        if self.range is not None:
+            lo, hi = self.range
+        else:
+            lo, hi = self.meas.range_minmax.query(0, len(y))[:2]
+        if hi <= lo:
+            hi = lo + 1.
+        self.edges = np.linspace(lo, hi, self.bins + 1)
+        # 0 - underflow, 1..bins, bins+1 - overflow
+        idx = np.floor((y - lo) * (self.bins / (hi - lo))).astype(np.intp) + 1
+        idx[y == hi] = self.bins               # the last edge is in the last bin
+        np.clip(idx, 0, self.bins + 1, out=idx)
+        dtype = np.uint16 if self.bins + 2 <= 2**16 else np.intp
+        self._idx = idx.astype(dtype)
+        self._counts = np.zeros(self.bins + 2, dtype=np.int64)
+        self.i1 = self.i2 = 0
+        self._version = self.meas.version
+
+    def _add(self, a, b, sign):
+        if b > a:
+            self._counts += sign * np.bincount(self._idx[a:b], minlength=self.bins + 2)
+
+    def set_window(self, i1, i2):
+        """   counts of the bins for [i1, i2)   """
+        self.meas.update()
+        if self._version != self.meas.version:
+            self._build()
+        n = len(self.meas.y)
+        i1 = min(max(int(i1), 0), n)
+        i2 = min(max(int(i2), i1), n)
+        delta = abs(i1 - self.i1) + abs(i2 - self.i2)
+        if i1 < self.i2 and self.i1 < i2 and delta < i2 - i1:
+            if i1 < self.i1:
+                self._add(i1, self.i1, 1)
+            else:
+                self._add(self.i1, i1, -1)
+            if i2 > self.i2:
+                self._add(self.i2, i2, 1)
+            else:
+                self._add(i2, self.i2, -1)
+        else:      # no overlap - counting anew is cheaper
+            self._counts[:] = 0
+            self._add(i1, i2, 1)
+        self.i1, self.i2 = i1, i2
+        return self.counts
+
+    @property
+    def counts(self):
+        return self._counts[1:-1]
+
+    @property
+    def underflow(self):
+        return self._counts[0]
+
+    @property
+    def overflow(self):
+        return self._counts[-1]
+
+
+class SlidingStats():
+    """
+    Statistics of the samples [i1, i2) of LineMeasure updated by sliding
+
+    For Move2Curr with razem - the window moves by a few samples
+    per motion event. Sums (shifted like in LineMeasure), the trapezoid
+    and the min/max monotonic deques are updated only by the samples
+    that entered or left the window, so the cost is O(delta),
+    not O(window width).
+    Deques follow the window moving forward (to greater x); after
+    any other move min/max come from the line pyramid, O(log n),
+    until the next counting anew.
+    Sums are counted anew when the samples moved add up to the window
+    width, so the rounding error doesn't pile up - still O(delta) amortized.
+
+    Methods take optional (i1, i2) - the same calls as for LineMeasure.
+    """
+
+    def __init__(self, meas):
+        self.meas = meas
+        self._version = None
+        self.i1 = self.i2 = 0
+        self._moved = 0
+
+    def _sums(self, a, b):
+        """   Σys, Σys², Σxs, Σxs·ys, Σxs² of the samples [a, b)   """
+        if b <= a:
+            return np.zeros(5)
+        ys = self.meas.y[a:b] - self.meas.y0
+        xs = self.meas.x[a:b] - self.meas.x0
+        return np.array([ys.sum(), (ys * ys).sum(), xs.sum(),
+                         (xs * ys).sum(), (xs * xs).sum()])
+
+    def _trap(self, a, b):
+        """   trapezoids between samples k and k+1, k in [a, b)   """
+        if b <= a:
+            return 0.
+        x, y = self.meas.x, self.meas.y
+        return ((y[a+1:b+1] + y[a:b]) * (x[a+1:b+1] - x[a:b])).sum() / 2.
+
+    @staticmethod
+    def _delta(func, o1, o2, n1, n2):
+        """   func over [n1, n2) minus func over [o1, o2), windows overlap   """
+        d = func(n1, o1) if n1 < o1 else -func(o1, n1)
+        d = d + func(o2, n2) if n2 > o2 else d - func(n2, o2)
+        return d
+
+    def _count_anew(self, i1, i2):
+        self._s = self._sums(i1, i2)
+        self._t = self._trap(i1, max(i1, i2 - 1))
+        self._mx = collections.deque()    # indices, y decreasing
+        self._mn = collections.deque()    # indices, y increasing
+        self._push(i1, i2)
+        self._dq = True
+        self._moved = 0
+
+    def _push(self, a, b):
+        y = self.meas.y
+        for k in range(a, b):
+            v = y[k]
+            while self._mx and y[self._mx[-1]] <= v:
+                self._mx.pop()
+            self._mx.append(k)
+            while self._mn and y[self._mn[-1]] >= v:
+                self._mn.pop()
+            self._mn.append(k)
+
+    def _pop_left(self, i1):
+        while self._mx and self._mx[0] < i1:
+            self._mx.popleft()
+        while self._mn and self._mn[0] < i1:
+            self._mn.popleft()
+
+    def set_window(self, i1, i2):
+        self.meas.update()
+        if self._version != self.meas.version:
+            self._version = self.meas.version
+            self.i1 = self.i2 = 0
+        n = len(self.meas.y)
+        i1 = min(max(int(i1), 0), n)
+        i2 = min(max(int(i2), i1), n)
+        if i1 == self.i1 and i2 == self.i2:
+            return self
+        o1, o2 = self.i1, self.i2
+        delta = abs(i1 - o1) + abs(i2 - o2)
+        self._moved += delta
+        if not (i1 < o2 and o1 < i2 and delta < i2 - i1) or self._moved > i2 - i1:
+            self._count_anew(i1, i2)
+        else:
+            self._s += self._delta(self._sums, o1, o2, i1, i2)
+            self._t += self._delta(self._trap, o1, o2 - 1, i1, i2 - 1)
+            if self._dq and i1 >= o1 and i2 >= o2:
+                self._push(o2, i2)
+                self._pop_left(i1)
+            else:
+                self._dq = False
+        self.i1, self.i2 = i1, i2
+        return self
+
+    def slide(self, delta_left, delta_right):
+        """   moves the window edges by the given numbers of samples   """
+        return self.set_window(self.i1 + delta_left, self.i2 + delta_right)
+
+    def _at(self, i1, i2):
+        if i1 is not None:
+            self.set_window(i1, i2)
+        if self.i2 <= self.i1:
+            raise ValueError("empty window [%d, %d)" % (self.i1, self.i2))
+        return self.i2 - self.i1
+
+    def count(self, i1=None, i2=None):
+        return self._at(i1, i2)
+
+    def mean(self, i1=None, i2=None):
+        n = self._at(i1, i2)
+        return self._s[0] / n + self.meas.y0
+
+    def rms(self, i1=None, i2=None):
+        n = self._at(i1, i2)
+        y0 = self.meas.y0
+        ms = (self._s[1] + 2. * y0 * self._s[0] + n * y0 ** 2) / n
+        return np.sqrt(max(ms, 0.))
+
+    def std(self, i1=None, i2=None):
+        n = self._at(i1, i2)
+        m = self._s[0] / n
+        return np.sqrt(max(self._s[1] / n - m * m, 0.))
+
+    def integral(self, i1=None, i2=None):
+        self._at(i1, i2)
+        return self._t
+
+    def lin_fit(self, i1=None, i2=None):
+        n = self._at(i1, i2)
+        sy, _, sx, sxy, sxx = self._s
+        den = n * sxx - sx * sx
+        if den == 0:
+            return 0., sy / n + self.meas.y0
+        a = (n * sxy - sx * sy) / den
+        b = (sy - a * sx) / n
+        return a, b + self.meas.y0 - a * self.meas.x0
+
+    def min_max(self, i1=None, i2=None):
+        self._at(i1, i2)
+        if not self._dq:
+            return self.meas.min_max(self.i1, self.i2)
+        y = self.meas.y
+        return y[self._mn[0]], y[self._mx[0]]
+
+    def pik_pik(self, i1=None, i2=None):
+        vmin, vmax = self.min_max(i1, i2)
+        return vmax - vmin
@@ -0,0 +1,722 @@
+"""
+Live data for the VisToole tools.
+"""
+
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from matplotlib.image import AxesImage
+from vis_canvas import BlitLayer
+
+
+class RingBuffer():
+    """
+    Fixed capacity buffer of the latest samples, preallocated NumPy array
+
+    put(value) - O(1), extend(array) - two slice copies at most,
+    no matter how many samples. The oldest samples are overwritten.
+    channels - samples of 'channels' values each (rows of the buffer),
+    a tuple - samples of that shape (e.g. whole sweeps),
+    dtype - any NumPy dtype, a structured one for mixed channels.
+
+    views() - the samples in time order as one or two views of the buffer,
+    no copy. array() - one ordered copy, only when it's really needed,
+    array(out=) - into a buffer of the caller, nothing allocated.
+    count - all the samples ever written, so the consumer knows
+    how many it has missed.
+    """
+
+    def __init__(self, capacity, dtype=float, channels=None):
+        if capacity < 1:
+            raise ValueError("'capacity' should be greater than 0")
+        self.capacity = int(capacity)
+        self.channels = channels
+        self.buf = np.zeros(self._shape(), dtype=dtype)
+        self.count = 0
+
+    def _shape(self):
+        if self.channels is None:
+            return (self.capacity,)
+        return (self.capacity,) + tuple(np.atleast_1d(self.channels))
+
+    @property
+    def dtype(self):
+        return self.buf.dtype
+
+    @property
+    def _head(self):
+        """   index of the next write   """
+        return self.count % self.capacity
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def clear(self):
+        self.count = 0
+
+    def put(self, value):
+        """   returns the sample overwritten or None   """
+        head = self._head
+        # a copy of the slice - any dtype, also object and structured
+        old = self.buf[head:head + 1].copy()[0] if self.full else None
+        self.buf[head] = value
+        self.count += 1
+        return old
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.buf.dtype)
+        m = len(values)
+        cap = self.capacity
+        head = self._head
+        if m >= cap:
+            # only the last cap values, every one at its index % cap
+            values = values[m - cap:]
+            head = (self.count + m) % cap
+            self.buf[head:] = values[:cap - head]
+            self.buf[:head] = values[cap - head:]
+        else:
+            first = min(m, cap - head)
+            self.buf[head:head + first] = values[:first]
+            self.buf[:m - first] = values[first:]
+        self.count += m
+
+    def views(self, n=None, count=None):
+        """
+        the latest n samples (all if None), oldest first, as views
+
+        count - as it was read, if it's read once for many calls
+        """
+        count = self.count if count is None else count
+        size = min(count, self.capacity)
+        n = size if n is None else min(max(int(n), 0), size)
+        head = count % self.capacity
+        start = (head - n) % self.capacity
+        if start + n <= self.capacity:
+            return (self.buf[start:start + n],)
+        return (self.buf[start:], self.buf[:head])
+
+    def array(self, n=None, out=None):
+        """
+        the latest n samples, oldest first, as one new array
+
+        out - an array at least as long to fill instead, its head is returned
+        """
+        return self._snapshot(n, out=out)[0]
+
+    def since(self, count):
+        """
+        (samples written after 'count' - at most capacity, count now)
+
+        for a consumer going through all the data, e.g. Trigger
+        """
+        return self._snapshot(after=count)
+
+    def _snapshot(self, n=None, after=None, out=None):
+        count = self.count
+        if after is not None:
+            n = max(count - after, 0)
+        v = self.views(n, count)
+        if out is not None:
+            out = out[:sum(len(a) for a in v)]
+            return np.concatenate(v, out=out), count
+        return (v[0].copy() if len(v) == 1 else np.concatenate(v)), count
+
+    def last(self):
+        if self.count == 0:
+            raise IndexError("empty buffer")
+        return self.buf[self._head - 1]
+
+
+class SharedRing(RingBuffer):
+    """
+    RingBuffer in multiprocessing.shared_memory - for a producer process
+
+    Header of 8 int64 before the samples:
+        0 - magic, 1 - count (the write index is count % capacity),
+        2 - sequence number, odd while a write is in progress,
+        3 - capacity, 4 - channels (0 - none), 5 - item size
+    The producer process attaches by name and writes as to RingBuffer,
+    the figure reads straight from the shared memory - no pickling,
+    no pipe. array() and since() copy only once, checking the sequence number
+    like a seqlock, so a write during the copy makes it try again.
+    views() are zero-copy, the reader should check seq itself.
+
+        ring = SharedRing(1000000, channels=2)           # figure process
+        sim = Simulator(ring, rate=1e6).start()         # or own producer
+        live = LiveStream(lines, ring, dx=1e-6)
+        live.start()
+        ...  sim.stop(), ring.close(), ring.unlink()
+
+    In the producer: SharedRing(1000000, channels=2, name=ring.name, create=False)
+    """
+
+    magic = 0x56495352    # 'VISR'
+    header_len = 8
+
+    def __init__(self, capacity, dtype=float, channels=None, name=None, create=True):
+        if capacity < 1:
+            raise ValueError("'capacity' should be greater than 0")
+        self.capacity = int(capacity)
+        self.channels = channels
+        dtype = np.dtype(dtype)
+        hsize = self.header_len * 8
+        size = hsize + dtype.itemsize * int(np.prod(self._shape()))
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=size if create else 0)
+        self.header = np.ndarray((self.header_len,), dtype=np.int64, buffer=self.shm.buf)
+        self.buf = np.ndarray(self._shape(), dtype=dtype, buffer=self.shm.buf, offset=hsize)
+        info = [self.capacity, channels or 0, dtype.itemsize]
+        if create:
+            self.header[:] = 0
+            self.header[3:6] = info
+            self.header[0] = self.magic
+        elif self.header[0] != self.magic or list(self.header[3:6]) != info:
+            raise ValueError("'%s' is not a SharedRing of this shape" % name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def count(self):
+        return int(self.header[1])
+
+    @count.setter
+    def count(self, value):
+        self.header[1] = value
+
+    @property
+    def seq(self):
+        return int(self.header[2])
+
+    def put(self, value):
+        self.header[2] += 1
+        old = RingBuffer.put(self, value)
+        self.header[2] += 1
+        return old
+
+    def extend(self, values):
+        self.header[2] += 1
+        RingBuffer.extend(self, values)
+        self.header[2] += 1
+
+    def clear(self):
+        self.header[2] += 1
+        self.count = 0
+        self.header[2] += 1
+
+    def _snapshot(self, n=None, after=None, out=None):
+        while True:
+            seq = self.seq
+            if seq & 1:        # being written
+                time.sleep(0)
+                continue
+            data = RingBuffer._snapshot(self, n, after, out)
+            if self.seq == seq:
+                return data
+
+    def close(self):
+        del self.header, self.buf
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _simulate(name, capacity, dtype, channels, stop, source_kwargs):
+    """   the simulator process   """
+    ring = SharedRing(capacity, dtype, channels, name=name, create=False)
+    source = SignalSource(channels=channels, **source_kwargs)
+    try:
+        while not stop.is_set():
+            ring.extend(source())
+    finally:
+        ring.close()
+
+
+class Simulator():
+    """
+    Acquisition simulated in its own process, writing SignalSource
+    blocks into a SharedRing - for tests and demos of the live mode
+
+    On Windows the process imports the main script again - it should have
+    if __name__ == '__main__':
+    """
+
+    def __init__(self, ring, **kwargs):
+        """   kwargs - for SignalSource: rate, block, freq, amp, noise, seed   """
+        self.ring = ring
+        self.kwargs = kwargs
+        self._stop = multiprocessing.Event()
+        self.process = None
+
+    def start(self):
+        self._stop.clear()
+        self.process = multiprocessing.Process(
+            target=_simulate, daemon=True,
+            args=(self.ring.name, self.ring.capacity, self.ring.dtype,
+                  self.ring.channels, self._stop, self.kwargs))
+        self.process.start()
+        return self
+
+    def stop(self, timeout=2.):
+        self._stop.set()
+        if self.process is not None:
+            self.process.join(timeout)
+            self.process = None
+
+
+class SignalSource():
+    """
+    Simulated acquisition - blocks of sine + noise at 'rate' samples/s
+
+    Calling it waits until the next block is due, like a driver read,
+    and returns it. channels - phase shifted copies.
+    """
+
+    def __init__(self, rate=1e6, block=None, freq=None, amp=1.5, noise=1.,
+                 channels=None, seed=None):
+        self.rate = rate
+        self.block = block if block is not None else max(int(rate / 100), 1)  # 10 ms
+        self.freq = freq if freq is not None else rate / 1000.
+        self.amp = amp
+        self.noise = noise
+        self.channels = channels
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+        self._t0 = None
+
+    def __call__(self):
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        due = self._t0 + (self.count + self.block) / self.rate
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        n = np.arange(self.count, self.count + self.block)
+        self.count += self.block
+        ch = 1 if self.channels is None else self.channels
+        phase = 2 * np.pi * self.freq * n[:, None] / self.rate + np.arange(ch) * np.pi / 3
+        y = self.amp * np.sin(phase) + self.noise * self._rng.standard_normal((self.block, ch))
+        return y[:, 0] if self.channels is None else y
+
+
+class Trigger():
+    """
+    Edge trigger of a stream - aligned sweeps, like in a scope
+
+    Every chunk is searched for the level crossings at once (NumPy),
+    interpolated between samples. Holdoff - the samples from one trigger
+    to the earliest next one - is applied by jumping between the
+    crossings, so Python loops only over the sweeps taken, never over
+    samples. A sweep is 'length' samples, 'pre' of them before
+    the trigger, all the channels of the stream. Sweeps waiting for
+    their samples are completed by the next chunks.
+
+    sweeps - RingBuffer of the last 'depth' sweeps, one per row,
+    fracs - their trigger positions after the sample before them,
+    0..1 - the display shifts the sweep by it, so it stays still.
+    channel - the column of the stream the trigger looks at.
+    """
+
+    slopes = ('rising', 'falling', 'both')
+
+    def __init__(self, length, level=0., slope='rising', holdoff=None, pre=0,
+                 channel=0, depth=16):
+        if slope not in self.slopes:
+            raise ValueError("slope should be 'rising', 'falling' or 'both'")
+        self.length = int(length)
+        self.level = level
+        self.slope = slope
+        self.holdoff = self.length if holdoff is None else holdoff
+        self.pre = int(pre)
+        self.channel = channel
+        self.depth = depth
+        self.reset()
+
+    def reset(self, seen=None):
+        """   seen - ring count to follow from, None - the whole ring   """
+        self.sweeps = None     # made for the shape and dtype of the stream
+        self.fracs = RingBuffer(self.depth)
+        self.seen = seen       # ring count already processed
+        self._tail = None      # the last samples kept for the next sweeps
+        self._start = 0 if seen is None else seen   # stream index of _tail[0]
+        self._next = -np.inf   # earliest next trigger
+        self._pending = np.empty(0)
+
+    def _crossings(self, y):
+        """   positions of the level crossings in y, in samples from y[0]   """
+        a, b = y[:-1], y[1:]
+        if self.slope == 'rising':
+            hit = (a < self.level) & (b >= self.level)
+        elif self.slope == 'falling':
+            hit = (a > self.level) & (b <= self.level)
+        else:
+            hit = ((a < self.level) & (b >= self.level)) | \
+                  ((a > self.level) & (b <= self.level))
+        i = np.flatnonzero(hit)
+        return i + (self.level - a[i]) / (b[i] - a[i])
+
+    def _apply_holdoff(self, t):
+        t = t[t >= self._next]
+        if len(t) == 0:
+            return t
+        if len(t) == 1 or np.diff(t).min() >= self.holdoff:
+            taken = t      # nothing to skip
+        else:
+            taken = []
+            i = 0
+            while i < len(t):
+                taken.append(t[i])
+                i = int(np.searchsorted(t, t[i] + self.holdoff, side='left'))
+            taken = np.array(taken)
+        self._next = taken[-1] + max(self.holdoff, 1e-9)
+        return taken
+
+    def process(self, chunk):
+        """   the next samples of the stream, returns the number of new sweeps   """
+        chunk = np.asarray(chunk)
+        if len(chunk) == 0:
+            return 0
+        old = 0 if self._tail is None else len(self._tail)
+        data = chunk if old == 0 else np.concatenate((self._tail, chunk))
+        start = self._start
+        sig = data if data.ndim == 1 else data[:, self.channel]
+        # the new samples and the one before them
+        s0 = max(old - 1, 0)
+        t = self._crossings(sig[s0:]) + (s0 + start)
+        # too early after the start or a gap for the pre samples
+        t = self._apply_holdoff(t[np.ceil(t) - self.pre >= start])
+        t = np.concatenate((self._pending, t))
+        # sample k0 + i of the stream is sample i of the sweep
+        k0 = np.ceil(t).astype(np.int64) - self.pre
+        ready = k0 + self.length <= start + len(data)
+        self._pending = t[~ready]
+        new = int(ready.sum())
+        if new > 0:
+            if self.sweeps is None:
+                self.sweeps = RingBuffer(self.depth, data.dtype,
+                                         (self.length,) + data.shape[1:])
+            idx = (k0[ready] - start)[:, None] + np.arange(self.length)
+            self.sweeps.extend(data[idx])
+            self.fracs.extend(np.ceil(t[ready]) - t[ready])
+        keep = min(len(data), self.length + self.pre + 1)
+        self._tail = data[len(data) - keep:]
+        self._start = start + len(data) - keep
+        return new
+
+    def follow(self, ring, lock=None):
+        """
+        processes what was written to the ring since the last call
+
+        lock - held while copying from the ring, e.g. LiveStream.lock
+        If the ring has overwritten samples not processed yet,
+        the trigger starts again after the gap.
+        """
+        if lock is None:
+            data, count = ring.since(self.seen)
+        else:
+            with lock:
+                data, count = ring.since(self.seen)
+        if self.seen is None:
+            # the first call - the ring content as the stream start
+            self._start = count - len(data)
+        elif count < self.seen or count - self.seen > len(data):
+            # cleared or overwritten
+            self._tail = None
+            self._pending = np.empty(0)
+            self._start = count - len(data)
+        self.seen = count
+        return self.process(data)
+
+
+def aligned(sweeps, fracs):
+    """
+    sweeps resampled to the trigger grid - no jitter between them
+
+    Sample i of a sweep is taken fracs (0..1) after the grid point i,
+    linear interpolation gives the values at the grid points.
+    sweeps - (n, length) or (n, length, channels), fracs - (n,)
+    """
+    sweeps = np.asarray(sweeps, dtype=float)
+    f = np.asarray(fracs, dtype=float).reshape((-1,) + (1,) * (sweeps.ndim - 1))
+    out = sweeps * (1. - f)
+    out[:, 1:] += sweeps[:, :-1] * f
+    out[:, 0] += sweeps[:, 0] * f[:, 0]      # nothing before the first one
+    return out
+
+
+class SweepAverage():
+    """
+    Running mean of the triggered sweeps
+
+    The plain mean of the first n sweeps, then exponential with 1/n,
+    like the averaging of a scope - noise down by about sqrt(n).
+    """
+
+    def __init__(self, n=16):
+        self.n = n
+        self.clear()
+
+    def clear(self):
+        self.mean = None
+        self.count = 0
+
+    def add(self, sweeps, fracs):
+        for s in aligned(sweeps, fracs):
+            self.count += 1
+            if self.mean is None or self.mean.shape != s.shape:
+                self.mean = s
+                self.count = 1
+            else:
+                self.mean += (s - self.mean) / min(self.count, self.n)
+        return self.mean
+
+
+class Persistence():
+    """
+    Triggered sweeps as one intensity image, like a phosphor screen
+
+    Every sweep adds its samples to a 2D histogram (bincount), older ones
+    decay by 'decay' per sweep, so it's one image artist for any number
+    of sweeps, instead of thousands of lines to draw and pick over.
+    x - one column per sweep sample, from x0 with dx like LiveStream,
+    y - 'bins' rows over ylim (the axes ylim as default),
+    channel - of a multichannel stream.
+    Other kwargs go to the image, e.g. cmap.
+    """
+
+    def __init__(self, ax, length, dx=1., x0=0., ylim=None, bins=256,
+                 decay=0.95, channel=0, **kwargs):
+        self.ax = ax
+        self.length = int(length)
+        self.ylim = ax.get_ylim() if ylim is None else ylim
+        self.bins = bins
+        self.decay = decay
+        self.channel = channel
+        self.hist = np.zeros((bins, self.length))
+        kwargs.setdefault('cmap', 'viridis')
+        kwargs.setdefault('interpolation', 'nearest')
+        kwargs.setdefault('zorder', 0.5)     # under the lines and grid
+        # not imshow or set_extent - the axes limits stay as they are
+        extent = (x0 - dx / 2, x0 + (self.length - 0.5) * dx) + tuple(self.ylim)
+        self.image = AxesImage(ax, origin='lower', extent=extent, **kwargs)
+        self.image.set_data(self.hist)
+        self.image.set_visible(False)
+        ax.add_image(self.image)
+
+    def clear(self):
+        self.hist[:] = 0.
+        self.image.set_data(self.hist)
+
+    def add(self, sweeps, fracs):
+        y = aligned(sweeps, fracs)
+        if y.ndim == 3:
+            y = y[:, :, self.channel]
+        n = len(y)
+        if n == 0:
+            return
+        y1, y2 = self.ylim
+        row = np.floor((y - y1) * (self.bins / (y2 - y1))).astype(np.int64)
+        ok = (row >= 0) & (row < self.bins)
+        cell = row * self.length + np.arange(self.length)
+        # the newest sweep with weight 1, older ones already decayed
+        w = np.broadcast_to((self.decay ** np.arange(n - 1, -1, -1.))[:, None],
+                            y.shape)
+        self.hist *= self.decay ** n
+        self.hist += np.bincount(cell[ok], w[ok],
+                                 minlength=self.hist.size).reshape(self.hist.shape)
+        self.image.set_data(self.hist)
+        self.image.set_clim(0., max(self.hist.max(), 1e-12))
+        self.image.set_visible(True)
+
+
+class LiveStream():
+    """
+    Lines fed from a RingBuffer, the oscilloscope mode
+
+    A producer thread (feed(source)) writes blocks into the ring,
+    a canvas timer takes the latest samples fps times per second,
+    sets them to the lines and redraws only the blit layer - the lines,
+    the cursors and the readouts over the cached background.
+    Data rate and redraw rate are independent - frames take only
+    the newest samples, the lock is held only for copying,
+    so neither side waits for the other.
+
+    x of the samples - x0 + i·dx, the oldest at x0, like a rolling scope.
+    Ring channels (columns or fields) go to the lines in order.
+    addfunc is called after every new frame - e.g. the measurements.
+
+    set_trigger(Trigger) - triggered mode: every frame shows the latest
+    sweep, the trigger point at x0 + pre·dx, None - rolling again.
+    set_average(n) - the running mean of the sweeps instead, 0 - off,
+    set_persistence(Persistence) - all the sweeps under the lines.
+    """
+
+    fps = 25
+
+    def __init__(self, lines, ring, dx=1., x0=0., fps=None):
+        self.lines = list(lines)
+        self.ring = ring
+        self.dx = dx
+        self.x0 = x0
+        self.fps = LiveStream.fps if fps is None else fps
+        self.fig = self.lines[0].figure
+        self.canvas = self.fig.canvas
+        self.lock = threading.Lock()
+        self._seen = 0
+        self._x = None
+        # every frame is copied here - one buffer for the whole run
+        self._frame = np.empty_like(ring.buf)
+        self.trigger = None
+        self.average = None
+        self.persistence = None
+        self._addfunc = None
+        self._timer = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.running = False
+
+    def set_addfunc(self, func):
+        self._addfunc = func
+
+    def set_trigger(self, trigger):
+        with self.lock:
+            if trigger is not None:
+                # from the samples to come
+                trigger.reset(self.ring.count)
+            self.trigger = trigger
+            self._seen = 0
+            self._x = None
+        self._clear_sweeps()
+
+    def set_average(self, n):
+        self.average = SweepAverage(n) if n else None
+
+    def set_persistence(self, persistence):
+        layer = BlitLayer.of(self.fig)
+        if self.persistence is not None:
+            layer.remove(self.persistence.image)
+            self.persistence.image.remove()
+        self.persistence = persistence
+        if persistence is not None:
+            persistence.clear()
+            if self.running:
+                layer.add(persistence.image)
+        self.canvas.draw_idle()
+
+    def _clear_sweeps(self):
+        if self.average is not None:
+            self.average.clear()
+        if self.persistence is not None:
+            self.persistence.clear()
+            self.persistence.image.set_visible(False)
+
+    def write(self, block):
+        """   for the producer - any thread   """
+        with self.lock:
+            self.ring.extend(block)
+
+    def feed(self, source):
+        """   producer thread calling source() for blocks, None ends it   """
+        def run():
+            while not self._stop.is_set():
+                block = source()
+                if block is None:
+                    break
+                self.write(block)
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def _artists(self):
+        if self.persistence is None:
+            return self.lines
+        return self.lines + [self.persistence.image]
+
+    def start(self, source=None):
+        if self.running:
+            return
+        # the lines, the cursors and the readouts blitted while running
+        BlitLayer.of(self.fig).begin(*self._artists())
+        if self._timer is None:
+            self._timer = self.canvas.new_timer(interval=max(int(1000 / self.fps), 1))
+            self._timer.add_callback(self.refresh)
+        self._timer.start()
+        if source is not None:
+            self.feed(source)
+        self.running = True
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.)
+            self._thread = None
+        if self._timer is not None:
+            self._timer.stop()
+        self.running = False
+        BlitLayer.of(self.fig).end(self._artists())
+
+    def _columns(self, data):
+        if data.dtype.names is not None:
+            return [data[name] for name in data.dtype.names]
+        if data.ndim == 1:
+            return [data]
+        return list(data.T)
+
+    def _sweep(self):
+        trig = self.trigger
+        new = trig.follow(self.ring, self.lock)
+        if new == 0:
+            return None, None
+        if self.average is not None or self.persistence is not None:
+            sweeps, fracs = trig.sweeps.array(new), trig.fracs.array(new)
+            if self.persistence is not None:
+                self.persistence.add(sweeps, fracs)
+            if self.average is not None:
+                # aligned to the grid already
+                mean = self.average.add(sweeps, fracs)
+                return self.x0 + np.arange(trig.length) * self.dx, mean
+        # the sweep shifted by the trigger position between the samples
+        x = self.x0 + (np.arange(trig.length) + trig.fracs.last()) * self.dx
+        return x, trig.sweeps.last()
+
+    def refresh(self):
+        """   one frame, returns False if there was nothing new   """
+        if self.trigger is not None:
+            x, data = self._sweep()
+            if data is None:
+                return False
+            for line, y in zip(self.lines, self._columns(data)):
+                line.set_data(x, y)
+            if self._addfunc is not None:
+                self._addfunc()
+            BlitLayer.of(self.fig).update()
+            return True
+        with self.lock:
+            if self.ring.count == self._seen:
+                return False
+            self._seen = self.ring.count
+            # Line2D.set_ydata keeps its own copy, the buffer is reused
+            data = self.ring.array(out=self._frame)
+        n = len(data)
+        new_x = self._x is None or len(self._x) != n
+        if new_x:
+            self._x = self.x0 + np.arange(n) * self.dx
+        for line, y in zip(self.lines, self._columns(data)):
+            # x only when its length changes - cached mappers stay valid
+            if new_x:
+                line.set_xdata(self._x)
+            line.set_ydata(y)
+        if self._addfunc is not None:
+            self._addfunc()
+        BlitLayer.of(self.fig).update()
+        return True
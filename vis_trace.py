@@ -0,0 +1,641 @@
+"""
+Drawing of long traces.
+
+LineLOD - the line keeps its full resolution data - get_xdata(),
+get_ydata(), LineMeasure and the cursors see every sample.
+Only what goes to the renderer is decimated.
+
+TraceStore - recordings bigger than RAM, samples and min/max pyramid
+in np.memmap files, the line gets only what is drawn or measured.
+
+StructureBuilder - the structures of long lines built in a process pool.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from matplotlib.lines import Line2D
+from vis_measure import IndexMapper, LineMeasure, RangeMinMax, line_sums, sum_names
+
+
+def minmax_columns(bx, mn, mx, amn, amx, x1, x2, width):
+    """
+    blocks of samples -> pixel columns
+
+    bx - x of the first samples of the blocks, mn, mx, amn, amx - their
+    min, max and indices of them. Blocks are grouped in width columns
+    of [x1, x2], returns sorted indices of the min and the max
+    of every column. NaN are skipped, an all-NaN column gives
+    its first sample (drawn as a gap).
+    """
+    edges = np.linspace(x1, x2, width + 1)[1:-1]
+    starts = np.unique(np.concatenate(([0], np.searchsorted(bx, edges))))
+    starts = starts[starts < len(bx)]
+    cmin = amn[_group_first(mn, starts, np.fmin)]
+    cmax = amx[_group_first(mx, starts, np.fmax)]
+    idx = np.empty(2 * len(starts), dtype=np.int64)
+    idx[0::2] = np.minimum(cmin, cmax)
+    idx[1::2] = np.maximum(cmin, cmax)
+    # the first and the last block may start before x1 or end after x2
+    idx.sort()
+    return idx
+
+
+def _group_first(v, starts, ufunc):
+    """
+    index of the first extreme value in every group,
+    ufunc - np.fmin / np.fmax, the groups without one (all NaN) give their start
+    """
+    ext = ufunc.reduceat(v, starts)
+    counts = np.diff(np.append(starts, len(v)))
+    hit = np.flatnonzero(v == np.repeat(ext, counts))
+    group, first = np.unique(np.searchsorted(starts, hit, side='right') - 1,
+                             return_index=True)
+    idx = np.array(starts, dtype=np.int64)
+    idx[group] = hit[first]
+    return idx
+
+
+class LineLOD():
+    """
+    Level of detail of one Line2D - min/max decimation at draw time
+
+    For the current x limits and the axes width in pixels every pixel
+    column gets the min and the max of its samples, drawn at their own x,
+    in the order of samples - at most 2 points per column, the peaks
+    stay exactly where they are. They come from the line pyramid
+    (RangeMinMax.of(line)) if it's already built for the data,
+    else from one pass over the samples in the view.
+    The line is drawn by a shadow Line2D taking its style,
+    so alpha, linewidth etc. set by LegView work as usual.
+    Lines with unsorted x or not longer than 2 points per column
+    are drawn as they are, lines still built by StructureBuilder
+    are drawn coarse.
+
+    LineLOD.of(line) - one per line, release() gives the line back
+    """
+
+    def __init__(self, line):
+        self.line = line
+        self._shadow = Line2D([], [])
+        self._last = None    # (x orig, y orig, view, (x, y) drawn)
+        # the instance attribute hides Line2D.draw for this line only
+        line.draw = self.draw
+
+    @classmethod
+    def of(cls, line):
+        # kept by the line - it holds the line and the line's draw
+        lod = getattr(line, '_vis_lod', None)
+        if lod is None:
+            lod = cls(line)
+            line._vis_lod = lod
+        return lod
+
+    @classmethod
+    def get(cls, line):
+        """   the level of detail of the line if it is cls, else None   """
+        lod = getattr(line, '_vis_lod', None)
+        return lod if isinstance(lod, cls) else None
+
+    def release(self):
+        if 'draw' in self.line.__dict__:
+            del self.line.draw
+        self.line.__dict__.pop('_vis_lod', None)
+        self.line.stale = True
+
+    def decimate(self, x1, x2, width):
+        """
+        indices of the samples drawn for the x range [x1, x2]
+        and width pixel columns, None - every sample
+        """
+        line = self.line
+        width = max(int(width), 1)
+        if StructureBuilder.building(line):
+            # coarse - every step-th sample of the whole line, until it's built
+            n = len(line.get_ydata(orig=True))
+            return np.arange(0, n, max(n // (4 * width), 1))
+        mapper = IndexMapper.of(line)
+        n = mapper.n
+        if not mapper.sorted or n <= 2 * width:
+            return None
+        i1, i2 = mapper.window(x1, x2)
+        # neighbours out of the view - the line goes up to the axes edges
+        i1, i2 = max(i1 - 1, 0), min(i2 + 1, n)
+        if i2 - i1 <= 2 * width:
+            return np.arange(i1, i2)
+        x = mapper.x
+        rmm = RangeMinMax.cached(line)
+        if rmm is None:
+            # new data (e.g. live) - one pass over the view beats building the pyramid
+            y = np.asarray(line.get_ydata(orig=True))[i1:i2]
+            a = np.arange(i1, i2)
+            idx = minmax_columns(x[i1:i2], y, y, a, a, x[i1], x[i2 - 1], width)
+        else:
+            # level with blocks not longer than a pixel column
+            k = min(max(int(np.log2((i2 - i1) / width)), 1), rmm.depth - 1)
+            mn, mx, amn, amx = rmm.level(k)
+            b1, b2 = i1 >> k, min(((i2 - 1) >> k) + 1, len(mn))
+            # blocks -> pixel columns by x of their first samples
+            bx = x[np.minimum(np.arange(b1, b2) << k, n - 1)]
+            idx = minmax_columns(bx, mn[b1:b2], mx[b1:b2], amn[b1:b2], amx[b1:b2],
+                                 x[i1], x[i2 - 1], width)
+        return np.sort(np.concatenate(([i1], idx, [i2 - 1])))
+
+    def view_data(self, x1, x2, width):
+        """   (x, y) drawn for the view, None - the line as it is   """
+        idx = self.decimate(x1, x2, width)
+        if idx is None:
+            return None
+        return (np.asarray(self.line.get_xdata(orig=True))[idx],
+                np.asarray(self.line.get_ydata(orig=True))[idx])
+
+    def draw(self, renderer):
+        line = self.line
+        ax = line.axes
+        if not line.get_visible():
+            return
+        if ax is None:
+            return Line2D.draw(line, renderer)
+        xo = line.get_xdata(orig=True)
+        yo = line.get_ydata(orig=True)
+        view = (ax.get_xbound(), ax.bbox.width)
+        last = self._last
+        if last is None or last[0] is not xo or last[1] is not yo or last[2] != view:
+            self._last = (xo, yo, view, self.view_data(view[0][0], view[0][1], view[1]))
+        if self._last[3] is None:
+            return Line2D.draw(line, renderer)
+        shadow = self._shadow
+        shadow.update_from(line)
+        shadow.set_antialiased(line.get_antialiased())
+        shadow.set_data(*self._last[3])
+        if shadow.figure is None:
+            shadow.set_figure(line.figure)
+        shadow.draw(renderer)
+
+
+class TraceStore():
+    """
+    Uniformly sampled recording in a directory of np.memmap files
+
+        meta.json   - n, dtype, x0, dx, label, block sizes of the levels
+        y.bin       - raw samples
+        lvl<b>.bin  - min, max, argmin, argmax of the blocks of b samples
+
+    Levels grow 4 times from blocks of 16 samples, the pyramid takes
+    ~2.7 bytes per sample. Opening only maps the files, so it's instant
+    for any size - pages are read when they are drawn or measured.
+
+    Writing, chunk by chunk, nothing is kept in RAM:
+        with TraceStore.create('rec.vtr', dtype='f4', dx=1e-6) as st:
+            for chunk in source:
+                st.write(chunk)
+    Reading:
+        st = TraceStore('rec.vtr')
+        line = st.plot(ax, label='s5')    # then LegView as usual
+    """
+
+    base = 16       # samples in the blocks of the first level
+    factor = 4      # blocks of the next level
+    chunk = 1 << 22    # samples processed at once while building
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.n = self.meta['n']
+        self.dtype = np.dtype(self.meta['dtype'])
+        self.x0 = self.meta['x0']
+        self.dx = self.meta['dx']
+        self.label = self.meta.get('label', '')
+        self.blocks = self.meta.get('blocks', [])
+        self.y = self._map('y.bin', self.dtype, self.n, mode)
+        self.levels = [self._map('lvl%d.bin' % b, self._level_dtype(self.dtype),
+                                 -(-self.n // b), mode) for b in self.blocks]
+
+    @staticmethod
+    def _level_dtype(dtype):
+        return np.dtype([('min', dtype), ('max', dtype),
+                         ('amin', np.int64), ('amax', np.int64)])
+
+    def _map(self, name, dtype, n, mode):
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode=mode, shape=(n,))
+
+    @classmethod
+    def create(cls, path, dtype='f8', x0=0., dx=1., label=''):
+        return TraceWriter(path, dtype, x0, dx, label)
+
+    @classmethod
+    def save(cls, path, y, x0=0., dx=1., label=''):
+        """   whole array at once   """
+        y = np.asarray(y)
+        with cls.create(path, y.dtype, x0, dx, label) as st:
+            for i in range(0, len(y), cls.chunk):
+                st.write(y[i:i + cls.chunk])
+        return cls(path)
+
+    def __len__(self):
+        return self.n
+
+    def x_at(self, i):
+        return self.x0 + np.asarray(i) * self.dx
+
+    def window(self, x1, x2):
+        """   [i1, i2) of the samples with x1 <= x <= x2   """
+        if x1 > x2:
+            x1, x2 = x2, x1
+        i1 = int(np.ceil((x1 - self.x0) / self.dx))
+        i2 = int(np.floor((x2 - self.x0) / self.dx)) + 1
+        return min(max(i1, 0), self.n), min(max(i2, 0), self.n)
+
+    def full(self, i1, i2, step=1):
+        """   (x, y) of the samples [i1, i2), every step-th - read into RAM   """
+        i1, i2 = max(int(i1), 0), min(int(i2), self.n)
+        i2 = max(i1, i2)
+        return self.x_at(np.arange(i1, i2, step)), np.array(self.y[i1:i2:step], dtype=float)
+
+    def decimate(self, x1, x2, width):
+        """
+        (x, y) of the min and the max of every pixel column
+        of [x1, x2], plus the neighbours out of it
+        """
+        width = max(int(width), 1)
+        i1, i2 = self.window(x1, x2)
+        i1, i2 = max(i1 - 1, 0), min(i2 + 1, self.n)
+        if i2 - i1 <= 2 * width:
+            return self.full(i1, i2)
+        # the biggest blocks not longer than a pixel column
+        k = -1
+        for j, b in enumerate(self.blocks):
+            if b <= (i2 - i1) / width:
+                k = j
+        if k < 0:     # not so many samples - from the raw ones
+            y = np.asarray(self.y[i1:i2])
+            a = np.arange(i1, i2)
+            idx = minmax_columns(self.x_at(a), y, y, a, a,
+                                 self.x_at(i1), self.x_at(i2 - 1), width)
+        else:
+            b = self.blocks[k]
+            b1, b2 = i1 // b, (i2 - 1) // b + 1
+            lvl = self.levels[k][b1:b2]
+            idx = minmax_columns(self.x_at(np.arange(b1, b2) * b),
+                                 lvl['min'], lvl['max'], lvl['amin'], lvl['amax'],
+                                 self.x_at(i1), self.x_at(i2 - 1), width)
+        idx = np.sort(np.concatenate(([i1], idx, [i2 - 1])))
+        return self.x_at(idx), np.asarray(self.y[idx], dtype=float)
+
+    def plot(self, ax, width=1000, **kwargs):
+        """
+        Line2D of the store in ax, drawn by TraceView
+
+        The line itself holds the whole recording decimated
+        to 'width' columns - for autoscale and the legend.
+        """
+        kwargs.setdefault('label', self.label)
+        x, y = self.decimate(self.x0, self.x_at(self.n - 1), width)
+        line, = ax.plot(x, y, **kwargs)
+        TraceView(self, line)
+        return line
+
+
+class TraceWriter():
+    """
+    Appends samples to a new TraceStore, builds the pyramid on close()
+    """
+
+    def __init__(self, path, dtype='f8', x0=0., dx=1., label=''):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.meta = dict(n=0, dtype=np.dtype(dtype).str, x0=float(x0),
+                         dx=float(dx), label=label, blocks=[])
+        self._f = open(os.path.join(path, 'y.bin'), 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, y):
+        y = np.ascontiguousarray(y, dtype=self.meta['dtype'])
+        self._f.write(y.tobytes())
+        self.meta['n'] += len(y)
+
+    def close(self):
+        if self._f is None:
+            return
+        self._f.close()
+        self._f = None
+        self._save_meta()
+        self._build()
+        self._save_meta()
+
+    def _save_meta(self):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=1)
+
+    def _build(self):
+        st = TraceStore(self.path)
+        n, base, factor = st.n, TraceStore.base, TraceStore.factor
+        ldt = TraceStore._level_dtype(st.dtype)
+        b, src, blocks = base, None, []
+        while n > 0 and (src is None or len(src) > 1):
+            m = -(-n // b)
+            dst = st._map('lvl%d.bin' % b, ldt, m, 'w+')
+            # 'step' entries of src (samples or blocks) per block of dst
+            step = base if src is None else factor
+            c = TraceStore.chunk // step * step
+            size = n if src is None else len(src)
+            for i in range(0, size, c):
+                j = min(i + c, size)
+                if src is None:
+                    a = np.arange(i, j)
+                    v = np.asarray(st.y[i:j])
+                    mn, mx, amn, amx = v, v, a, a
+                else:
+                    s = src[i:j]
+                    mn, mx, amn, amx = s['min'], s['max'], s['amin'], s['amax']
+                starts = np.arange(0, j - i, step)
+                jmin = _group_first(mn, starts, np.fmin)
+                jmax = _group_first(mx, starts, np.fmax)
+                out = dst[i // step:i // step + len(starts)]
+                out['min'], out['amin'] = mn[jmin], amn[jmin]
+                out['max'], out['amax'] = mx[jmax], amx[jmax]
+            dst.flush()
+            blocks.append(b)
+            src = dst
+            b *= factor
+        self.meta['blocks'] = blocks
+
+
+class TraceView(LineLOD):
+    """
+    Line2D of a TraceStore - what is drawn comes from the store
+
+    measure(x1, x2) - LineMeasure of the samples between x1 and x2
+    at full resolution. They are read once, with a margin for
+    the cursor moves, and kept until a window out of them is asked.
+    """
+
+    margin = 0.5    # of the window, read on both sides
+    max_load = 1 << 26    # samples, ~0.5 GB of float
+
+    def __init__(self, store, line):
+        self.store = store
+        self._full = None    # (i1, i2, step, LineMeasure)
+        LineLOD.__init__(self, line)
+        line._vis_lod = self
+
+    def view_data(self, x1, x2, width):
+        return self.store.decimate(x1, x2, width)
+
+    def measure(self, x1=None, x2=None):
+        """
+        x1, x2 None - the current view
+
+        A window longer than max_load samples is measured
+        on every step-th sample - a zoomed out view of a huge capture
+        gives approximate values instead of filling the RAM.
+        """
+        if x1 is None:
+            x1, x2 = self.line.axes.get_xbound()
+        i1, i2 = self.store.window(x1, x2)
+        i1, i2 = max(i1, 0), min(i2, self.store.n)
+        step = max(-(-(i2 - i1) // self.max_load), 1)
+        full = self._full
+        if full is None or i1 < full[0] or i2 > full[1] or step != full[2]:
+            # plus the neighbours - values between the samples
+            m = int((i2 - i1) * self.margin) + step
+            j1, j2 = max(i1 - m, 0), min(i2 + m, self.store.n)
+            if (j2 - j1) // step > self.max_load:
+                j1, j2 = max(i1 - step, 0), min(i2 + step, self.store.n)    # no room for the margin
+            line = Line2D(*self.store.full(j1, j2, step))
+            self._full = full = (j1, j2, step, LineMeasure(line))
+        return full[3]
+
+
+def _layout(n):
+    """
+    [(name, dtype, length, offset), ...] of the structures of n samples
+    in one shared memory block - the same in the pool and in the figure
+    """
+    items = [(k, np.float64, n if k == 'trap' else n + 1) for k in sum_names]
+    m, k = n, 1
+    while m > 1:
+        m = (m + 1) // 2
+        items += [('mn%d' % k, np.float64, m), ('mx%d' % k, np.float64, m),
+                  ('amn%d' % k, np.intp, m), ('amx%d' % k, np.intp, m)]
+        k += 1
+    layout, offset = [], 0
+    for name, dtype, length in items:
+        layout.append((name, dtype, length, offset))
+        offset += np.dtype(dtype).itemsize * length
+    return layout, offset
+
+
+def _views(buf, layout):
+    return {name: np.ndarray((length,), dtype=dtype, buffer=buf, offset=offset)
+            for name, dtype, length, offset in layout}
+
+
+def _build_structures(in_name, out_name, n):
+    """
+    in the pool - x, y from shared memory 'in_name',
+    sums and pyramid levels to 'out_name', returns IndexMapper flags
+    """
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    try:
+        xy = np.ndarray((2, n), dtype=np.float64, buffer=shm_in.buf)
+        x, y = xy[0], xy[1]
+        layout = _layout(n)[0]
+        out = _views(shm_out.buf, layout)
+        line_sums(x, y, out)
+        rmm = RangeMinMax(y)
+        for k in range(1, rmm.depth):
+            mn, mx, amn, amx = rmm.level(k)
+            out['mn%d' % k][:] = mn
+            out['mx%d' % k][:] = mx
+            out['amn%d' % k][:] = amn
+            out['amx%d' % k][:] = amx
+        flags = (True, False)
+        if n >= 2:
+            flags = IndexMapper.flags(x, (x[-1] - x[0]) / (n - 1))
+        # level 0 of the pyramid is y itself
+        del xy, x, y, out, rmm
+        return flags
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+
+class _Segment(shared_memory.SharedMemory):
+    """   shared memory with views that may outlive it   """
+
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            # views still use the buffer and keep the mapping,
+            # it goes with the last of them
+            pass
+
+
+class StructureBuilder():
+    """
+    Measurement and drawing structures of long lines built in a process pool
+
+    For every line - LineMeasure sums, RangeMinMax pyramid (used by
+    the min/max, the crossings and LineLOD) and IndexMapper flags.
+    Samples go to the pool and the results come back in shared memory,
+    the structures are views of it - nothing is pickled or copied.
+    Until a line is done, its LineLOD draws it coarse, then the figure
+    is redrawn with the exact min/max. Results are polled by a canvas
+    timer, so the GUI main loop never waits.
+
+    On Windows the pool imports the main script again - it should have
+    if __name__ == '__main__':
+
+    StructureBuilder.of(fig).submit(*lines)
+    """
+
+    _pool = None
+    max_workers = None    # os.cpu_count()
+    poll_ms = 100
+
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self._pending = {}    # line: (future, shm in, shm out, x orig, y orig)
+        self._timer = None
+        self._close_ev_id = self.canvas.mpl_connect('close_event', self._on_close)
+
+    @classmethod
+    def of(cls, fig):
+        # kept by the figure - a class dict would keep the figure alive
+        builder = getattr(fig, '_vis_structure_builder', None)
+        if builder is None or builder.canvas is not fig.canvas:
+            builder = cls(fig)
+            fig._vis_structure_builder = builder
+        return builder
+
+    @classmethod
+    def building(cls, line):
+        builder = getattr(line.figure, '_vis_structure_builder', None)
+        return builder is not None and line in builder._pending
+
+    @classmethod
+    def pool(cls):
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(max_workers=cls.max_workers)
+        return cls._pool
+
+    def submit(self, *lines):
+        for line in lines:
+            if line in self._pending:
+                continue
+            xo = line.get_xdata(orig=True)
+            yo = line.get_ydata(orig=True)
+            n = len(yo)
+            size = _layout(n)[1]
+            shm_in = shared_memory.SharedMemory(create=True, size=max(16 * n, 1))
+            shm_out = _Segment(create=True, size=max(size, 1))
+            xy = np.ndarray((2, n), dtype=np.float64, buffer=shm_in.buf)
+            xy[0], xy[1] = xo, yo
+            del xy
+            future = self.pool().submit(_build_structures, shm_in.name, shm_out.name, n)
+            self._pending[line] = (future, shm_in, shm_out, xo, yo)
+        if self._pending:
+            self._start_timer()
+
+    def _start_timer(self):
+        if self._timer is None:
+            self._timer = self.canvas.new_timer(interval=self.poll_ms)
+            self._timer.add_callback(self.poll)
+        self._timer.start()
+
+    def poll(self):
+        """   installs what is done, redraws if anything was   """
+        done = [line for line, p in self._pending.items() if p[0].done()]
+        for line in done:
+            future, shm_in, shm_out, xo, yo = self._pending.pop(line)
+            self._free(shm_in)
+            if future.exception() is not None or \
+               line.get_xdata(orig=True) is not xo or line.get_ydata(orig=True) is not yo:
+                # failed or the data has changed - built in place when needed
+                self._free(shm_out)
+                continue
+            self._install(line, future.result(), shm_out, xo, yo)
+            line.stale = True
+        if not self._pending and self._timer is not None:
+            self._timer.stop()
+        if done:
+            self.canvas.draw_idle()
+
+    def _on_close(self, event):
+        """   the figure is gone - what is still built is not needed   """
+        if self._timer is not None:
+            self._timer.stop()
+        for future, shm_in, shm_out, xo, yo in self._pending.values():
+            # a running build keeps its own mapping until it ends
+            future.cancel()
+            self._free(shm_in)
+            self._free(shm_out)
+        self._pending.clear()
+
+    @staticmethod
+    def _free(shm):
+        shm.close()
+        shm.unlink()
+
+    @staticmethod
+    def _install(line, flags, shm_out, xo, yo):
+        n = len(yo)
+        out = _views(shm_out.buf, _layout(n)[0])
+        # the mapping stays until the views are gone, the name is not needed
+        shm_out.unlink()
+        levels = []
+        k = 1
+        while 'mn%d' % k in out:
+            levels.append(tuple(out[p + str(k)] for p in ('mn', 'mx', 'amn', 'amx')))
+            k += 1
+        rmm = RangeMinMax(yo, levels)
+        meas = LineMeasure(line, out)
+        # the segment goes with the structures using it
+        rmm._segment = meas._segment = shm_out
+        IndexMapper.install(line, xo, IndexMapper(xo, flags))
+        RangeMinMax.install(line, yo, rmm)
+        line._vis_measure = meas
+
+
+################################################################################
+####################                      ######################################
+####################   Self-check         ######################################
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # a trace longer than LegView.lod with NaN gaps - a lost sample,
+    # a lost block and all-NaN pixel columns - drawn by samples and by pyramid
+    x = np.arange(200000.)
+    y = np.sin(x / 500.)
+    y[0] = np.nan
+    y[5000:5003] = np.nan
+    y[50000:90000] = np.nan
+    fig, ax = plt.subplots()
+    line, = ax.plot(x, y)
+    lod = LineLOD.of(line)
+    for pyramid in (False, True):
+        if pyramid:
+            RangeMinMax.of(line)
+        for xlim in ((0, 200000), (40000, 100000)):
+            ax.set_xlim(*xlim)
+            fig.canvas.draw()
+            xd, yd = lod._last[3]
+            assert len(xd) <= 2 * ax.bbox.width + 4, len(xd)
+            assert np.isnan(yd).any() and np.nanmax(yd) > 0.99, xlim
+    print('LineLOD with NaN gaps - ok')
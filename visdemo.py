@@ -83,6 +83,7 @@ lvbox = vs.CBoxy_mpl(boxy_level, [0.775, 0.175, 0.10, 0.10],
 def x2y_func():
     if lvbox.x2y:
         cYY.visible = True
+    tik_tik()
 
 lvbox.set_addfunc(x2y_func)
 
@@ -97,6 +98,11 @@ def ixy_on_off():
     else:
         lvbox.set_visible(False)
         lvbox.enable = False
+    fftV.set_visible(cbox1.fft_db_bx)
+    histV.set_relative(cbox1.histR_bx)
+    histV.set_visible(cbox1.histN_bx or cbox1.histR_bx)
+    tik_tik()
+    meas_readout()
     fig.canvas.draw_idle()
 
 cbox1.set_addfunc(ixy_on_off)
@@ -110,7 +116,6 @@ cbox1.set_addfunc(ixy_on_off)
     
 def add_leg_event(item):
     ax_line_x = legV.artists[item][0].get_xdata()
-    ax_line_y = ax_line = legV.artists[item][0].get_ydata()
     x1 = min(cXX.c1.x, cXX.c2.x)
     x2 = max(cXX.c1.x, cXX.c2.x)
     s1 = ax_line_x[0]
@@ -127,28 +132,110 @@ def add_leg_event(item):
     curr in plot window and at least one end of signal hooks to the curr window
 
     """
+    meas = legV.measure(item, xs, xe)    # the view
     if cXX.in_win and s1 < x2 and s2 > x1:    
-        idx1 = np.nonzero(ax_line_x >= x1)[0][0]
-        idx2 = np.nonzero(ax_line_x <= x2)[0][-1]            
+        idx1, idx2 = cXX.window(meas.line)
     elif calc_values:                                # out of curr window
         cXX.visible = False
-        idx1 = np.nonzero(ax_line_x >= xs)[0][0]
-        idx2 = np.nonzero(ax_line_x <= xe)[0][-1]
-    if calc_values:
-        if idx1 == idx2:
-            ax_line = ax_line_y[idx1]
-        else:           
-            ax_line = ax_line_y[idx1:idx2]
-
+        idx1, idx2 = meas.window(xs, xe)
+    idx1 = min(idx1, len(meas) - 1)
+    idx2 = max(idx2, idx1 + 1)      # at least the nearest sample
     if cbox1.pik_pik_bx:
         if calc_values:
-            cYY.c1.y = max(ax_line)
-            cYY.c2.y = min(ax_line)
+            # min/max pyramid of the line - no slicing
+            vmin, vmax = meas.min_max(idx1, idx2)
+            cYY.c1.y = vmax
+            cYY.c2.y = vmin
         else:
             cYY.c1.y = 0
             cYY.c2.y = 0
         cYY.update_osc()
         cYY.visible = True
+
+    focus[:] = [item]
+    fftV.set_line(meas)
+    histV.set_line(meas)
+    tik_tik()
+    meas_readout()
+
+
+meas_txt = vs.TextFrame(0.02, 0.03, '', ax=ax, picker=True, visible=False,
+                        fontsize=9, fontfamily='monospace',
+                        bbox=dict(fc='white', edgecolor='darkgreen'))
+
+focus = []    # legend item picked last
+
+def meas_readout():
+    """
+    statistics of the focused line between cXX cursors
+
+    it's cXX addfunc too, so it's live while dragging
+    """
+    txt = []
+    if len(focus) > 0 and cXX.in_win:
+        meas = legV.measure(focus[0], cXX.c1.x, cXX.c2.x)
+        i1, i2 = cXX.window(meas.line)
+        if cXX.razem:
+            # both cursors move - the window slides by a few samples
+            meas = meas.sliding
+        if i2 > i1:
+            if cbox1.rms_bx:
+                txt.append('RMS    = {:.4f}'.format(meas.rms(i1, i2)))
+            if cbox1.std_bx:
+                txt.append('rms≈   = {:.4f}'.format(meas.std(i1, i2)))
+            if cbox1.mean_bx:
+                txt.append('mean   = {:.4f}'.format(meas.mean(i1, i2)))
+            if cbox1.integr_bx:
+                txt.append('integr = {:.4f}'.format(meas.integral(i1, i2)))
+            if cbox1.lin_fit_bx:
+                txt.append('a·x+b  = {:.4f}·x{:+.4f}'.format(*meas.lin_fit(i1, i2)))
+            if cbox1.pik_pik_bx and cYY.visible:
+                # cYY follows the peaks while cXX is dragged
+                vmin, vmax = meas.min_max(i1, i2)
+                cYY.c1.y = vmax
+                cYY.c2.y = vmin
+                cYY.update_osc()
+    meas_txt.set(text='\n'.join(txt), visible=len(txt) > 0)
+
+
+def tik_tik():
+    """
+    tik-tik of the focused line
+
+    Y -> X - cXX jumps to the first two crossings of the cYY.c1 level
+             in the view, so ∆x is the period
+    X -> Y - cYY shows the line values at cXX cursors
+    """
+    if not cbox1.tik_tik_bx or len(focus) == 0:
+        return
+    if lvbox.y2x:
+        slope = 'falling' if lvbox.Level_20 else 'rising'
+        xs, xe = ax.get_xlim()
+        meas = legV.measure(focus[0], xs, xe)
+        t = meas.next_crossings(cYY.c1.y, xs, 2, slope)
+        if len(t) == 2 and t[1] <= xe:
+            cXX.c1.x, cXX.c2.x = t
+            cXX.update_osc()
+    elif lvbox.x2y:
+        meas = legV.measure(focus[0], cXX.c1.x, cXX.c2.x)
+        cYY.c1.y = meas.value_at(cXX.c1.x)
+        cYY.c2.y = meas.value_at(cXX.c2.x)
+        cYY.update_osc()
+
+def cXX_moved():
+    if lvbox.x2y:
+        tik_tik()
+    meas_readout()
+    fftV.update()
+    histV.update()
+
+def cYY_moved():
+    if lvbox.y2x:
+        tik_tik()
+    trigger.level = cYY.c1.y
+    meas_readout()
+    fftV.update()
+    histV.update()
             
 
 ############################  flying content example  #############################
@@ -286,6 +373,51 @@ cXX, cYY, cBB, legV = vs.Vistoole('xylegexar', exar=pp.exar,
 # position or label name
 legV.set_focus(2, 's4')
 
+# spectrum between cXX cursors, on with 'fft-dB'
+fftV = vs.FFTView(ax, cXX)
+# histogram between cXX cursors, on with 'histN'
+histV = vs.HistView(ax, cXX)
+
+cXX.set_addfunc(cXX_moved)
+cYY.set_addfunc(cYY_moved)
+vs.BlitLayer.of(fig).add(meas_txt.artist)   # redrawn with the cursors
+
+# live mode - 'm' feeds s1 from a simulated acquisition, 100 samples/s
+ring = vs.RingBuffer(len(t))
+ring.extend(s1)
+live = vs.LiveStream([legV.ax_lines[0]], ring, dx=dt)
+live.set_addfunc(cXX_moved)    # readouts follow the live data
+
+def live_on_off(event):
+    if live.running:
+        live.stop()
+    else:
+        live.start(vs.SignalSource(rate=1/dt, block=5, freq=0.5, seed=1))
+
+vs.EventRouter.of(fig).connect('key_press_event', live_on_off, 'm')
+
+# 't' - triggered at the cYY.c1 level, rising edge, 1 s before the trigger
+trigger = vs.Trigger(len(t), level=cYY.c1.y, slope='rising', pre=100)
+
+def trigger_on_off(event):
+    live.set_trigger(None if live.trigger is not None else trigger)
+
+vs.EventRouter.of(fig).connect('key_press_event', trigger_on_off, 't')
+
+# the triggered sweeps: 'n' - mean of 16, 'i' - persistence image
+def average_on_off(event):
+    live.set_average(None if live.average is not None else 16)
+
+def persistence_on_off(event):
+    if live.persistence is not None:
+        live.set_persistence(None)
+    else:
+        ax1 = legV.ax_lines[0].axes
+        live.set_persistence(vs.Persistence(ax1, len(t), dx=dt, cmap='magma'))
+
+vs.EventRouter.of(fig).connect('key_press_event', average_on_off, 'n')
+vs.EventRouter.of(fig).connect('key_press_event', persistence_on_off, 'i')
+
 #####################                                         #####################    
 #####################  just before plt.show()  instruction    #####################
 
@@ -11,6 +11,7 @@
 #####################################################
 
 
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from matplotlib.widgets import Button, CheckButtons
@@ -21,20 +22,28 @@ from matplotlib.patches import Patch
 from matplotlib.artist import Artist
 from vis_menu import edit_ml_label, patch_style
 from shapes import PointPatch as pp
+from vis_canvas import BlitLayer, DragScheduler, EventRouter, ExtentIndex
+from vis_legend import LegendFocus, LegendIndex, LegendPager
+from vis_measure import LineMeasure, IndexMapper, Spectrum, WindowHistogram
+from vis_trace import LineLOD, StructureBuilder, TraceView
+from vis_stream import LiveStream, Persistence, RingBuffer, SignalSource, Trigger
 
 
 
-class FIFO():
-    def __init__(self, length, **kwargs):
+class FIFO(RingBuffer):
+    """
+    RingBuffer of 'length' with the old interface
+
+    fifo=[...] - initial content, licz='on' - counting of put()
+    Like the old list it takes any values (dtype=object) and .fifo
+    is a list, oldest first - dtype=float etc. for a numeric ring.
+    """
+    def __init__(self, length, dtype=object, channels=None, **kwargs):
         if length < 1:
             raise ValueError("'length' should be greater than 0")
-        self._length = length
-        err = 1
-        if 'fifo' in kwargs:
-            if isinstance(kwargs['fifo'], list):
-                self._fifo = kwargs['fifo']
-                if len(self._fifo) > self._length:
-                    self._fifo = self._fifo[:self._length]
+        RingBuffer.__init__(self, length, dtype, channels)
+        if 'fifo' in kwargs and kwargs['fifo'] is not None:
+            self.extend(list(kwargs['fifo'])[:length])
 
         self.licz = -1
         if 'licz' in kwargs:
@@ -43,23 +52,22 @@ class FIFO():
 
 
     def put(self, value):
-        self._fifo.append(value)
-        if len(self._fifo) > self._length:
-            heap = self._fifo.pop(0)
+        heap = RingBuffer.put(self, value)
         if self.licz >= 0:
             self.licz += 1
         return heap
 
     @property
     def length(self):
-        return self._length
+        return self.capacity
         
     @property
     def fifo(self):
-        return self._fifo
+        return self.array().tolist()
 
     def reset(self):
-        self._fifo = [0 for i in range(self.length)]
+        self.clear()
+        self.extend(np.zeros_like(self.buf))
 
 
 ###      \/\/\/ Move   \/\/\/   #####
@@ -115,6 +123,12 @@ class MoveXY(TopVistoole):
         self.ax = None
         self.xstart = 0
         self.ystart = 0
+        self.blit = True          # redraw only the dragged artist
+        self.blit_artists = []    # other artists changed by addfunc
+        self._blit = None
+        self._blit_new = None
+        self.max_rate = DragScheduler.max_rate   # motions per second, 0 - all
+        self._sched = None
         
         for (k, v) in kwargs.items():
             if k in self.__dict__:
@@ -147,11 +161,29 @@ class MoveXY(TopVistoole):
         self.xy = self.transOrygin.inverted().transform(xy)
         if hasattr(self.obj, 'grab'):
             self.obj.set_grab(self.xy)
-        self.follower = self.fig.canvas.mpl_connect("motion_notify_event", self._make_drag)
+        self._sched = DragScheduler(self.fig.canvas, self._make_drag, self.max_rate)
+        self.follower = self.fig.canvas.mpl_connect("motion_notify_event", self._sched.push)
         self.releaser = self.fig.canvas.mpl_connect("button_release_event", self._stop)
         self.is_move = True
         if self._prefunc != None:
             self._prefunc()
+        self._blit_begin(self.obj, *self.blit_artists)
+
+    def _blit_begin(self, *artists):
+        """
+        moving artists go to the animated layer
+
+        the rest of the figure is cached as the background
+        """
+        if self.blit and self._blit_new is None:    # one session per drag
+            self._blit = BlitLayer.of(self.fig)
+            self._blit_new = self._blit.begin(*artists)
+
+    def _redraw(self):
+        if self._blit_new is not None:
+            self._blit.update()
+        else:
+            self.fig.canvas.draw_idle()
 
     def _get_position(self):
         return self.obj.get_position()
@@ -179,13 +211,16 @@ class MoveXY(TopVistoole):
         if self._addfunc != None:
             self._addfunc()
 
-        # self.fig.canvas.draw()
-        self.fig.canvas.draw_idle()
+        self._redraw()
 
     def _stop(self, event):
         self.fig.canvas.mpl_disconnect(self.releaser)
         self.fig.canvas.mpl_disconnect(self.follower)
+        self._sched.flush()    # the last position is always applied
         self.is_move = False
+        if self._blit_new is not None:
+            self._blit.end(self._blit_new)  # one full draw at the end
+            self._blit_new = None
 
         
 
@@ -347,11 +382,13 @@ class CBoxy_mpl(CBoxy):
             self.clear_all()
 
         self.box_move = MoveBox()
-        self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event', self._on_pick)
-        self._click_ev_id = self.fig.canvas.mpl_connect('button_press_event',
-                                                            self._on_click)
+        router = EventRouter.of(self.fig)
+        self._pick_ev_id = router.connect('pick_event', self._on_pick, self.ax)
+        self._click_ev_id = router.connect('button_press_event',
+                                           self._on_click, 3)
             
         self.zzi = kwargs.get('zz', [])
+        ExtentIndex.of(self.fig).register(*self.zzi)
         
 
     def __repr__(self):
@@ -360,7 +397,10 @@ class CBoxy_mpl(CBoxy):
 
 
     def what_in_plot(self):
-        # list of elements that delete pick events
+        """
+        list of elements that delete pick events -> self.zz
+        kept for the callers, the clicks ask ExtentIndex
+        """
         self.zz = self.zzi.copy()
         self.zz += [c for c in self.fig.get_children()[1:]]
         
@@ -379,11 +419,7 @@ class CBoxy_mpl(CBoxy):
        
         if (event.button == 3) and self.click_ev_vis:
             
-            self.what_in_plot()
-        
-            if not any(map(lambda x: x.get_window_extent().contains(event.x,
-                                                                    event.y)
-                               and x.get_visible(), self.fig.axes + self.zz)):
+            if ExtentIndex.of(self.fig).is_empty(event.x, event.y):
                 self.set_visible(not self.get_visible())
                 
             self.fig.canvas.draw_idle()
@@ -547,8 +583,9 @@ class TextFrame(MoveXY):
         self.fig = self.frame.get_figure()
 
         if move_on:
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event',
-                                                           self._on_pick)
+            self._pick_ev_id = EventRouter.of(self.fig).connect('pick_event',
+                                                                self._on_pick,
+                                                                self.frame)
 
         self._update_text_func = self._update_text
 
@@ -758,6 +795,10 @@ class Move1Curr(MoveXY):
         if self.fig == None:
             self.fig = self.line.get_figure()
 
+        if self.blit:
+            # cursor overlay - drawn as usual, while dragged (or live) only blitted
+            BlitLayer.of(self.fig).add(self.line, self.label)
+
         if self.xonly and self.yonly:
             raise RuntimeWarning("'xonly' and 'yonly' can't be both eq 'True'")
 
@@ -767,7 +808,7 @@ class Move1Curr(MoveXY):
 
         self._pick_ev_id = None
         if pick_event == 'on':
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event', self._on_pick)
+            self.set_on_pick(True)
 
     def _on_pick(self, event):
         if self.on_pick_button == event.mouseevent.button:
@@ -775,11 +816,11 @@ class Move1Curr(MoveXY):
                 self.drag(event)
 
     def set_on_pick(self, val):
+        router = EventRouter.of(self.fig)
+        router.disconnect(self._pick_ev_id)
+        self._pick_ev_id = None
         if val:
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event', self._on_pick)
-        else:
-            self.fig.canvas.mpl_disconnect(self._pick_ev_id)
-            self._pick_ev_id = None
+            self._pick_ev_id = router.connect('pick_event', self._on_pick, self.line)
         
     @property
     def in_win(self):
@@ -833,11 +874,13 @@ class Move1Curr(MoveXY):
             if k in self.__dict__:
                 setattr(self, k, v)
         
-        self.follower = self.fig.canvas.mpl_connect("motion_notify_event", self._make_drag)
+        self._sched = DragScheduler(self.fig.canvas, self._make_drag, self.max_rate)
+        self.follower = self.fig.canvas.mpl_connect("motion_notify_event", self._sched.push)
         self.releaser = self.fig.canvas.mpl_connect("button_release_event", self._stop)
         self.is_move = True
         if self._prefunc != None:
             self._prefunc(self)
+        self._blit_begin(self.line, self.label, *self.blit_artists)
 
         
     def _make_drag(self, event):
@@ -852,7 +895,7 @@ class Move1Curr(MoveXY):
         if self._addfunc != None:
             self._addfunc(self)
         """ this can also be in addfunc """
-        self.fig.canvas.draw()
+        self._redraw()
 
     @property
     def razem(self):
@@ -1000,10 +1043,6 @@ class Move2Curr(MoveXY):
         if self.fig == None:
             self.fig = self.c1.line.get_figure()
 
-        self._pick_ev_id = None
-        if pick_event == 'on':
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event', self._on_pick)
-
         if self.is_oscillo:
             """
             oscilloscope like indicator
@@ -1044,6 +1083,19 @@ class Move2Curr(MoveXY):
         else:
             self.oscillo = False
 
+        """
+        cursors, their labels and the oscillo readout are in the blit layer,
+        so while a cursor is dragged (or a live stream runs) only they are blitted,
+        otherwise they are drawn as usual - under the legend and the panels
+        """
+        layer = [self.c1.line, self.c1.label, self.c2.line, self.c2.label]
+        if self.oscillo:
+            layer.append(self.oscillo.artist)
+        if self.c1.blit:
+            BlitLayer.of(self.fig).add(*layer)
+        self.c1.blit_artists = layer[2:]
+        self.c2.blit_artists = layer[:2] + layer[4:]
+
         """
         oscilloscope on/off buttons
 
@@ -1072,29 +1124,32 @@ class Move2Curr(MoveXY):
             self.butt_id = self.button.on_clicked(self.toggle_visible)
         
 
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event',
-                                                           self._on_pick)
-
-            self._click_ev_id = self.fig.canvas.mpl_connect('button_press_event',
-                                                            self._on_click)
+            self._click_ev_id = EventRouter.of(self.fig).connect(
+                'button_press_event', self._on_click, 3)
 
             self.butt_move = MoveBox(fig=self.fig, ax=self.ax)
             
+        self._pick_ev_id = None
+        if pick_event == 'on' or self.buttons:
+            self.set_on_pick(True)
 
-        self.kbd_ev_id = self.fig.canvas.mpl_connect('key_press_event',
-                                                    self.key_press)
-
-            
+        self.kbd_ev_id = EventRouter.of(self.fig).connect('key_press_event',
+                                                          self.key_press, 'a', 'A')
 
-        self.zz = [c for c in self.ax.xaxis.get_children() if isinstance(c, plt.Text)]
-        self.zz += [c for c in self.ax.yaxis.get_children() if isinstance(c, plt.Text)]
-        self.zz.append(self.ax.title)
 
         # because there is such a property 
         if 'visible' in kwargs:
             self.visible = kwargs['visible']
 
 
+    @property
+    def zz(self):
+        """   axis texts and the title - kept for the callers, the clicks ask ExtentIndex   """
+        zz = [c for c in self.ax.xaxis.get_children() if isinstance(c, plt.Text)]
+        zz += [c for c in self.ax.yaxis.get_children() if isinstance(c, plt.Text)]
+        zz.append(self.ax.title)
+        return zz
+
     def _on_click(self, event):
         """
         Oscillo buttons on/off
@@ -1103,9 +1158,7 @@ class Move2Curr(MoveXY):
        
         if event.button == 3:
         
-            if not any(map(lambda x: x.get_window_extent().contains(event.x,
-                                                                    event.y)
-                               and x.get_visible(), self.fig.axes + self.zz)):
+            if ExtentIndex.of(self.fig).is_empty(event.x, event.y):
                 self.ax_butt.set_visible(not self.ax_butt.get_visible())
         self.fig.canvas.draw_idle()
 
@@ -1248,11 +1301,15 @@ class Move2Curr(MoveXY):
         """
 
     def set_on_pick(self, val):
-        if val:
-            self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event', self._on_pick)
-        else:
-            self.fig.canvas.mpl_disconnect(self._pick_ev_id)
-            self._pick_ev_id = None
+        router = EventRouter.of(self.fig)
+        router.disconnect(self._pick_ev_id)
+        self._pick_ev_id = None
+        # button axes and oscillo icons are picked here
+        artists = [self.ax_butt] if self.buttons else []
+        if self.oscillo:
+            artists.append(self.oscillo.artist)
+        if val and len(artists) > 0:
+            self._pick_ev_id = router.connect('pick_event', self._on_pick, *artists)
 
     def get_center(self):
         """
@@ -1294,6 +1351,16 @@ class Move2Curr(MoveXY):
         """  False if not both in win   """
         return self.c1.in_win and self.c1.in_win
 
+    def window(self, line):
+        """
+        [i1, i2) - samples of the line between x cursors
+
+        for addfuncs - e.g. line.get_ydata()[slice(*cXX.window(line))]
+        """
+        if self.cxy != 'x':
+            raise ValueError("window() needs 'x' cursors")
+        return IndexMapper.of(line).window(self.c1.x, self.c2.x)
+
     @property    
     def artist(self):
         """   alias .line   """
@@ -1381,6 +1448,11 @@ class LegView(TopVistoole):
         self.add2view = False
         self.in1view = False
         self.add_ed = 0.5
+        self.lod = 10000     # longer ax_lines are drawn decimated, 0 - never
+        self.prebuild = False # True - their structures are built in the process pool
+        self.page = 20        # legend entries, more lines - scrolled by the mouse wheel
+        self.tags = None      # {tag: leg_items} and
+        self.groups = None    # {group: leg_items} for find() and select()
 
         for (k, v) in kwargs.items():
             if k in self.__dict__:
@@ -1394,48 +1466,142 @@ class LegView(TopVistoole):
         self.active = dict(ax_la = 1,   lg_la = 1,   lg_ba = 1,   ax_lw = 1.7, ax_zr = 2.5)
         self.passiv = dict(ax_la = 0.2, lg_la = 0.5, lg_ba = 0.6, ax_lw = 1.7, ax_zr = 2)
 
-        self.legend = self.ax.legend(loc='upper right', edgecolor='black',
-                                     draggable=self.leg_draggable)
-
         if self.fig == None:
-            self.fig = self.legend.get_figure()
+            self.fig = self.ax.get_figure()
+
+        self.lods = {}        # ax_line: LineLOD
+        self._tagged = {}     # tag: ax_lines
+        self._grouped = {}    # group: ax_lines
+        self._pick_ev_id = None
+        self._leg_box = None      # legend extent, computed once after every draw
+        self._make_legend()
+        for tag, items in (self.tags or {}).items():
+            self.tag(tag, *items)
+        for group, items in (self.groups or {}).items():
+            self.add_group(group, *items)
+
+        router = EventRouter.of(self.fig)
+        self._click_ev_id = router.connect('button_press_event', self._on_click, 1)
+
+        self._hover = False       # pointer over the legend
+        self.on_hov_id = self.fig.canvas.mpl_connect('motion_notify_event', self._on_hover)
+        self.draw_ev_id = self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        self.scroll_ev_id = self.fig.canvas.mpl_connect('scroll_event', self._on_scroll)
+
+        self.fig_ev_id = self.fig.canvas.mpl_connect('figure_leave_event', self.fig_leave)
 
+        self.key_ev_id = router.connect('key_press_event', self._key_press, 'shift')
+            
+
+    @property
+    def zz(self):
+        """   figure and ax texts, patches, the legend - kept for the callers, the clicks ask ExtentIndex   """
+        # first child is figure rectangle creating itself
+        zz = [c for c in self.fig.get_children()[1:]]
+        zz += [c for c in self.ax.get_children() if isinstance(c, (plt.Text, Patch))]
+        zz += [self.ax.title, self.ax.xaxis.get_label(),
+               self.ax.yaxis.get_label(), self.legend]
+        return zz
+
+    def _make_legend(self):
+        """   the legend and the item records of the labelled lines of ax   """
+        leg_kw = dict(loc='upper right', edgecolor='black', draggable=self.leg_draggable)
+        # the legend entries are made of these, in this order
+        handles, names = self.ax.get_legend_handles_labels()
+        self.pager = None
+        if self.page and len(handles) > self.page:
+            # only a page of entries in the legend, constant layout cost
+            self.legend = self.ax.legend(handles[:self.page], names[:self.page], **leg_kw)
+            self.pager = LegendPager(self.legend, handles, names)
+        else:
+            self.legend = self.ax.legend(handles, names, **leg_kw)
 
         self.legend.get_frame().set(picker=True)
         
-        self.leg_lines = self.legend.get_lines()   # lines in legend
-        self.leg_labels = self.legend.get_texts()  # legend labels
-        self.sig_labels = list(map(lambda x: x.get_text(), self.leg_labels))
-        self.ax_lines = [x for x in self.ax.get_children()
-                         if x.get_label() in self.sig_labels]
-
+        if self.pager is None:
+            self.leg_lines = self.legend.get_lines()   # lines in legend
+            self.leg_labels = self.legend.get_texts()  # legend labels
+        else:
+            # proxies of every item, the legend shows the page
+            self.leg_lines = self.pager.leg_lines
+            self.leg_labels = self.pager.leg_labels
+        self.sig_labels = names
+        self.ax_lines = handles
+
+        for line in [l for l in self.lods if l not in self.ax_lines]:
+            self.lods.pop(line)
+        if self.lod:
+            new = [line for line in self.ax_lines if line not in self.lods and
+                   TraceView.get(line) is None and len(line.get_xdata(orig=True)) > self.lod]
+            for line in new:
+                self.lods[line] = LineLOD.of(line)
+            if self.prebuild and new:
+                StructureBuilder.of(self.fig).submit(*new)
         self.artists = {}
         for i, k in enumerate(self.leg_labels):
             self.artists[self.leg_labels[i]] = [self.ax_lines[i], self.leg_lines[i],
                                                 self.leg_labels[i]]
             self.leg_labels[i].set_picker(True)  #  they will respond when it's label is picked
+        self.index = LegendIndex((self.artists[k] for k in self.leg_labels), names)
+        # by the ax_lines - the lines still there
+        for tag, lines in self._tagged.items():
+            self.index.tag(tag, self.index.lookup(*lines))
+        for group, lines in self._grouped.items():
+            self.index.group(group, self.index.lookup(*lines))
+        self.focus = LegendFocus(self.artists[k] for k in self.leg_labels)
+        shown = self.leg_labels        # legend texts
+        if self.pager is not None:
+            shown = self.pager.slot_labels
+            for label in shown:
+                label.set_picker(True)
 
         self.back_view()
 
-        self._pick_ev_id = self.fig.canvas.mpl_connect('pick_event',
-                                                        self._on_pick)
+        router = EventRouter.of(self.fig)
+        if self._pick_ev_id is not None:
+            router.disconnect(self._pick_ev_id)
+        self._pick_ev_id = router.connect('pick_event', self._on_pick,
+                                          self.legend.get_frame(), *shown)
+        self._leg_box = None
 
-        self._click_ev_id = self.fig.canvas.mpl_connect('button_press_event',
-                                                        self._on_click)
+    def add_lines(self, *lines):
+        """
+        new labelled lines into the legend, added to ax if not there yet
 
-        self.on_hov_id = self.fig.canvas.mpl_connect('motion_notify_event', self._on_hover)
+        The legend is made again, the focus starts from back_view.
+        """
+        for line in lines:
+            if line.axes is None:
+                self.ax.add_line(line)
+        self._make_legend()
+        self.fig.canvas.draw_idle()
 
-        self.fig_ev_id = self.fig.canvas.mpl_connect('figure_leave_event', self.fig_leave)
+    def remove_lines(self, *leg_items):
+        """   leg_items like in set_focus, their ax_lines leave ax and the legend   """
+        for i in set(self.index.lookup(*leg_items)):
+            self.ax_lines[i].remove()
+        self._make_legend()
+        self.fig.canvas.draw_idle()
 
-        self.key_ev_id = self.fig.canvas.mpl_connect('key_press_event', self._key_press)
+    def tag(self, tag, *leg_items):
+        """   '#tag' of find(), leg_items like in set_focus   """
+        idx = self.index.lookup(*leg_items)
+        self._tagged.setdefault(tag, []).extend(self.ax_lines[i] for i in idx)
+        self.index.tag(tag, idx)
 
-        # first child is figure rectangle creating itself
-        self.zz = [c for c in self.fig.get_children()[1:]]
+    def add_group(self, group, *leg_items):
+        """   '@group' of find(), leg_items like in set_focus   """
+        idx = self.index.lookup(*leg_items)
+        self._grouped[group] = [self.ax_lines[i] for i in idx]
+        self.index.group(group, idx)
 
-        self.zz += [c for c in self.ax.get_children() if isinstance(c, (plt.Text, Patch))]
-        self.zz += [self.ax.title, self.ax.xaxis.get_label(),
-                    self.ax.yaxis.get_label(), self.legend]
-            
+    def find(self, query):
+        """   item indexes of the query, see LegendIndex.query   """
+        return self.index.query(query)
+
+    def select(self, query):
+        """   focus on the items of the query - one batch, one redraw   """
+        self.set_focus(*self.find(query))
 
     @staticmethod
     def pan_zoom_off():
@@ -1449,14 +1615,38 @@ class LegView(TopVistoole):
         return self.legend.get_title()
 
     def fig_leave(self, event):
+        self._hover = False
         self.legend.shadow = False
         self.legend.set_draggable(False)
         self.fig.canvas.draw_idle()
         
 
+    def _on_draw(self, event):
+        self._leg_box = None
+
+    def _over_legend(self, event):
+        if self._leg_box is None:
+            self._leg_box = self.legend.get_window_extent()
+        return self.legend.get_visible() and self._leg_box.contains(event.x, event.y)
+
     def _on_hover(self, event):
-        if self.legend.get_window_extent().contains(event.x,event.y):
+        # every motion in the figure comes here - no layout, no draw,
+        # unless the pointer enters or leaves the legend
+        hover = self._over_legend(event)
+        if hover == self._hover:
+            return
+        self._hover = hover
+        if hover:
             self.pan_zoom_off()
+        self.fig.canvas.draw_idle()
+
+
+    def _on_scroll(self, event):
+        if self.pager is None or not self._over_legend(event):
+            return
+        first = self.pager.first
+        # wheel up - the items before
+        if self.pager.scroll(-event.step) != first:
             self.fig.canvas.draw_idle()
 
 
@@ -1466,16 +1656,13 @@ class LegView(TopVistoole):
 
         if event.button == 1:
             
-            if not any(map(lambda x: x.get_window_extent().contains(event.x,
-                                                                    event.y)
-                                and x.get_visible(),
-                           self.fig.axes + self.zz)):
+            if ExtentIndex.of(self.fig).is_empty(event.x, event.y):
                 self.back_view()
 
 
     def _on_pick(self, event):
         if event.mouseevent.button == 1:
-            if event.artist in self.leg_labels: 
+            if self._leg_item(event.artist) is not None:
                 self.leg_on_pick(event)
                 
             if event.artist == self.legend.get_frame():
@@ -1500,47 +1687,62 @@ class LegView(TopVistoole):
         self.fig.canvas.draw_idle()
 
 
+    # focus changes go to self.focus arrays first,
+    # the artists are set in one batch and drawn once
+
+    mute_keys = ('ax_la', 'ax_zr', 'lg_la', 'lg_ba')
+    normal_keys = ('ax_la', 'ax_lw', 'lg_la', 'lg_ba')
+
+    def _leg_item(self, artist):
+        """   leg_label of the item the artist shows, None - not an item   """
+        i = None if self.pager is None else self.pager.item_of(artist)
+        if i is None:
+            i = self.index.artists.get(artist)
+        return None if i is None else self.leg_labels[i]
+
+    def _apply(self):
+        self.focus.apply()
+        if self.pager is not None:
+            self.pager.sync()
+
     def leg_on_pick(self, event):
         self.in1view = True
-        artist = event.artist
+        artist = self._leg_item(event.artist)
         self._set_focus(artist)
+        self._apply()
         self.fig.canvas.draw_idle()
 
 
     def _set_focus(self, artist, add_func=True):
-        for item in self.leg_labels:
-            if item == artist:      # leg_label picked
-                # check if active is picked, then mute all
-                if self.artists[item][0].get_alpha() == self.active['ax_la']:
-                    self.set_all_mute()
-                else:
-                    self.artists[item][0].set_linewidth(self.active['ax_lw'])   # ax_line
-                    self.artists[item][0].set_zorder(self.active['ax_zr'])
-                    self.artists[item][0].set_alpha(self.active['ax_la'])
-                    self.artists[item][1].set_alpha(self.active['lg_la'])     # leg_line
-                    self.artists[item][2].set_alpha(self.active['lg_ba'])     # leg_label
-                    if self._addfunc != None and add_func:
-                        self._addfunc(item)
-            elif not self.add2view:       # every other artist but not that picked
-                 self.set_one_mute(item)
+        i = self.index.artists[artist]
+        # check if active is picked, then mute all
+        if self.focus.is_set(i, self.active, 'ax_la'):
+            self._mute()
+            return
+        if not self.add2view:       # every other artist but not that picked
+            self._mute()
+        self.focus.set(i, self.active)
+        if self._addfunc != None and add_func:
+            self._addfunc(artist)
+
+    def _mute(self, idx=slice(None)):
+        self.focus.set(idx, self.passiv, self.mute_keys)
 
                 
     def set_one_mute(self, item):
-        self.artists[item][0].set_alpha(self.passiv['ax_la'])
-        self.artists[item][0].set_zorder(self.passiv['ax_zr'])
-        self.artists[item][1].set_alpha(self.passiv['lg_la'])   
-        self.artists[item][2].set_alpha(self.passiv['lg_ba'])
+        self._mute(self.index.artists[item])
+        self._apply()
         
 
     def set_all_mute(self):
-        for item in self.leg_labels:
-            self.set_one_mute(item)
+        self._mute()
+        self._apply()
             
 
     def set_all_off(self):
-        for item in self.leg_labels:
-            self.set_one_mute(item)
-            self.artists[item][0].set_alpha(0)
+        self._mute()
+        self.focus.set(slice(None), dict(ax_la=0), ['ax_la'])
+        self._apply()
             
 
     def back_view(self):
@@ -1549,29 +1751,45 @@ class LegView(TopVistoole):
             self.legend.get_frame().set(linewidth=lw-self.add_ed)
         self.in1view = False
         self.add2view = False
-        for item in self.leg_labels:
-            self.artists[item][0].set_alpha(self.normal['ax_la'])
-            self.artists[item][0].set_linewidth(self.normal['ax_lw'])
-            self.artists[item][1].set_alpha(self.normal['lg_la'])  
-            self.artists[item][2].set_alpha(self.normal['lg_ba'])
-            self.fig.canvas.draw_idle()
+        self.focus.set(slice(None), self.normal, self.normal_keys)
+        self._apply()
+        self.fig.canvas.draw_idle()
             
             
     def set_focus(self, *leg_items):
-        item = []
-        for i, k in enumerate(leg_items):
-            if isinstance(k, int):
-                item.append(self.leg_labels[k])
-            elif isinstance(leg_items[i], str):
-                item += [c for c in self.leg_labels if c.get_text() == leg_items[i]]
-        self.set_all_mute()
+        """
+        leg_items - positions, label names, compiled regex patterns
+        (e.g. re.compile('^I[123]$')) or artists of the items
+        """
+        # an item asked twice (name and pattern) would toggle off again
+        idx = dict.fromkeys(self.index.lookup(*leg_items))
+        item = [self.leg_labels[i] for i in idx]
+        self._mute()
         self.add2view = True
         for i, k in enumerate(item):
             self._set_focus(k, add_func=False)
         self.add2view = False
+        self._apply()
         self.fig.canvas.draw_idle()
         
 
+    def measure(self, item, x1=None, x2=None):
+        """
+        LineMeasure of the ax_line
+
+        item - leg_label, its position or label name
+        x1, x2 - TraceStore lines: the samples read at full resolution
+                 (every step-th past TraceView.max_load),
+                 None - the view, other lines are measured whole
+        """
+        if isinstance(item, (int, str)):
+            item = self.leg_labels[self.index.lookup(item)[0]]
+        line = self.artists[item][0]
+        trace = TraceView.get(line)
+        if trace is not None:
+            return trace.measure(x1, x2)
+        return LineMeasure.of(line)
+
     def get_position(self):
         bb = self.legend.get_window_extent().get_points()   # pixele
         # bb = legend.get_bbox_to_anchor().get_points() -  to nie moze byc
@@ -1582,6 +1800,179 @@ class LegView(TopVistoole):
                 
 
 
+class InsetView():
+    """
+    Inset axes of ax showing something of the samples between x cursors
+
+    For the LineMeasure given by set_line().
+    update() is throttled like a drag - max_rate per second.
+    The artist shown is a blit layer member, so it is redrawn
+    with the cursors, only new axes limits cost a full draw.
+    Subclasses make self.artist and define _update().
+    """
+    def __init__(self, ax, curr, bounds, title='', max_rate=10, **kwargs):
+        self.ax = ax
+        self.fig = ax.get_figure()
+        self.curr = curr               # Move2Curr('x', ...)
+        self.meas = None
+
+        self.inset = ax.inset_axes(bounds, facecolor=kwargs.get('facecolor', 'white'))
+        self.inset.tick_params(labelsize=7)
+        self.inset.set_title(title, fontsize=8, pad=2)
+        self.inset.set_visible(kwargs.get('visible', False))
+
+        self._sched = DragScheduler(self.fig.canvas, self._update, max_rate)
+
+    def _add_artist(self, artist):
+        self.artist = artist
+        BlitLayer.of(self.fig).add(artist)
+
+    def set_line(self, meas):
+        self.meas = meas
+        self.update(force=True)
+
+    def get_visible(self):
+        return self.inset.get_visible()
+
+    def set_visible(self, vis):
+        self.inset.set_visible(vis)
+        if vis:
+            self.update(force=True)
+        self.fig.canvas.draw_idle()
+
+    def update(self, force=False):
+        if not self.get_visible() or self.meas is None:
+            return
+        self._sched.push(True)
+        if force:
+            self._sched.flush()
+
+    def _update(self, event):
+        pass
+
+    def _set_lims(self, xlim, ylim):
+        if self.inset.get_xlim() != xlim or self.inset.get_ylim() != ylim:
+            self.inset.set_xlim(xlim)
+            self.inset.set_ylim(ylim)
+            self.fig.canvas.draw_idle()     # new ticks
+        else:
+            BlitLayer.of(self.fig).update()
+
+
+class FFTView(InsetView):
+    """
+    fft-dB - spectrum of the line samples between x cursors
+
+    Windows of at least async_len samples are computed in a worker
+    thread, the GUI only picks up the result with a timer,
+    so cursor motion never waits for the FFT.
+    """
+    def __init__(self, ax, curr, bounds=(0.6, 0.06, 0.37, 0.3), window='hann',
+                 max_rate=10, async_len=2**16, **kwargs):
+        super().__init__(ax, curr, bounds, 'fft-dB', max_rate, **kwargs)
+        self.async_len = async_len
+        self.db_range = kwargs.get('db_range', 100)
+        self.spectrum = Spectrum(window)
+
+        self.line, = self.inset.plot([], [], lw=1, color=kwargs.get('color', 'darkgreen'))
+        self._add_artist(self.line)
+
+        self._pool = None
+        self._future = None
+        self._again = False
+        self._poll = None
+
+    def set_window(self, window):
+        self.spectrum.set_window(window)
+        self.update(force=True)
+
+    def _update(self, event):
+        i1, i2 = self.curr.window(self.meas.line)
+        if i2 - i1 < 2:
+            return
+        if i2 - i1 < self.async_len or \
+           self.spectrum.cached(self.meas, i1, i2) is not None:
+            self._show(self.spectrum.compute(self.meas, i1, i2))
+            return
+        if self._future is not None:
+            self._again = True    # one more with the newest window
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1)
+            self._poll = self.fig.canvas.new_timer(interval=30)
+            self._poll.add_callback(self.poll)
+        prep = self.spectrum.prepare(self.meas, i1, i2)
+        self._future = self._pool.submit(self.spectrum.fft, *prep)
+        self._poll.start()
+
+    def poll(self):
+        """   the worker result goes to the plot in the GUI thread   """
+        if self._future is None or not self._future.done():
+            return
+        self._poll.stop()
+        future = self._future
+        self._future = None
+        self._show(future.result())
+        if self._again:
+            self._again = False
+            self.update(force=True)
+
+    def _show(self, res):
+        f, db = res
+        self.line.set_data(f, db)
+        top = np.ceil(db.max() / 10.) * 10. + 10.
+        self._set_lims((0, f[-1]), (top - self.db_range, top))
+
+
+class HistView(InsetView):
+    """
+    histN / histR - histogram of the line samples between x cursors
+
+    horizontal, so bins lie along the y axis of the plot
+    relative=True - fractions of the window (histR), else counts (histN)
+    Counts are updated only by the samples entering or leaving
+    the window, see vis_measure.WindowHistogram.
+    """
+    def __init__(self, ax, curr, bounds=(0.62, 0.42, 0.2, 0.3), bins=64,
+                 relative=False, max_rate=30, **kwargs):
+        title = 'histR' if relative else 'histN'
+        super().__init__(ax, curr, bounds, title, max_rate, **kwargs)
+        self.bins = bins
+        self.relative = relative
+        self.hist = None
+        self.stairs = self.inset.stairs([0], [0, 1], orientation='horizontal',
+                                        fill=True, color=kwargs.get('color', 'darkgreen'),
+                                        alpha=0.7)
+        self._add_artist(self.stairs)
+
+    def set_line(self, meas):
+        self.hist = WindowHistogram(meas, self.bins)
+        super().set_line(meas)
+
+    def set_relative(self, relative):
+        if relative != self.relative:
+            self.relative = relative
+            self.inset.set_title('histR' if relative else 'histN', fontsize=8, pad=2)
+            self.update(force=True)
+            self.fig.canvas.draw_idle()
+
+    def _update(self, event):
+        counts = self.hist.set_window(*self.curr.window(self.meas.line))
+        n = max(self.hist.i2 - self.hist.i1, 1)
+        values = counts / n if self.relative else counts
+        edges = self.hist.edges
+        self.stairs.set_data(values, edges)
+        top = values.max()
+        hi = self.inset.get_xlim()[1]
+        # new limits only if the bars don't fit or fill less than a half
+        if top <= 0:
+            hi = 1
+        elif not 0.5 * hi < top <= hi:
+            hi = top * 1.2
+        self._set_lims((0, hi), (edges[0], edges[-1]))
+
+
+
 def Vistoole(toolsy, **kwargs):
     """
     toolsy='xbyb'
@@ -1656,7 +2047,8 @@ def Vistoole(toolsy, **kwargs):
 
     cXX = cYY = cBB = legV = 0
     plot_dict = dict(ax = 'ax', toggle_vis=False)
-    leg_dict = dict(ax = 'ax', leg_addfunc = None)
+    leg_dict = dict(ax = 'ax', leg_addfunc = None, lod = 10000, prebuild = False, page = 20,
+                    tags = None, groups = None)
     
     for (k, v) in kwargs.items():
         if k in plot_dict:
@@ -1687,8 +2079,8 @@ def Vistoole(toolsy, **kwargs):
             v.set_picker(True)
 
         vis_move = MoveXY(**plot_dict)
-        vis_pick_ev_id = fig.canvas.mpl_connect('pick_event',
-                                                vis_on_pick)
+        # any artist - right click styles every pickable patch
+        vis_pick_ev_id = EventRouter.of(fig).connect('pick_event', vis_on_pick)
         tlsy = toolsy.replace('exar', '')
     else:
         tlsy = toolsy
@@ -1709,8 +2101,8 @@ def Vistoole(toolsy, **kwargs):
     if 'leg' in toolsy:
         legV = LegView(**leg_dict)
 
-    kbd_ev_id = fig.canvas.mpl_connect('key_press_event',
-                                        toggle_visible)
+    kbd_ev_id = EventRouter.of(fig).connect('key_press_event', toggle_visible,
+                                            'a', 'A', 'z', 'Z', 'v', 'V')
     
     return cXX, cYY, cBB, legV
 
@@ -1785,6 +2177,7 @@ if __name__ == "__main__":
     def x2y_func():
         if lvbox.x2y:
             cYY.visible = True
+        tik_tik()
 
     lvbox.set_addfunc(x2y_func)
 
@@ -1799,6 +2192,11 @@ if __name__ == "__main__":
         else:
             lvbox.set_visible(False)
             lvbox.enable = False
+        fftV.set_visible(cbox1.fft_db_bx)
+        histV.set_relative(cbox1.histR_bx)
+        histV.set_visible(cbox1.histN_bx or cbox1.histR_bx)
+        tik_tik()
+        meas_readout()
         fig.canvas.draw_idle()
 
     cbox1.set_addfunc(ixy_on_off)
@@ -1812,7 +2210,6 @@ if __name__ == "__main__":
     
     def add_leg_event(item):
         ax_line_x = legV.artists[item][0].get_xdata()
-        ax_line_y = ax_line = legV.artists[item][0].get_ydata()
         x1 = min(cXX.c1.x, cXX.c2.x)
         x2 = max(cXX.c1.x, cXX.c2.x)
         s1 = ax_line_x[0]
@@ -1829,28 +2226,110 @@ if __name__ == "__main__":
         curr in plot window and at least one end of signal hooks to the curr window
 
         """
+        meas = legV.measure(item, xs, xe)    # the view
         if cXX.in_win and s1 < x2 and s2 > x1:    
-            idx1 = np.nonzero(ax_line_x >= x1)[0][0]
-            idx2 = np.nonzero(ax_line_x <= x2)[0][-1]            
+            idx1, idx2 = cXX.window(meas.line)
         elif calc_values:                                # out of curr window
             cXX.visible = False
-            idx1 = np.nonzero(ax_line_x >= xs)[0][0]
-            idx2 = np.nonzero(ax_line_x <= xe)[0][-1]
-        if calc_values:
-            if idx1 == idx2:
-                ax_line = ax_line_y[idx1]
-            else:           
-                ax_line = ax_line_y[idx1:idx2]
-
+            idx1, idx2 = meas.window(xs, xe)
+        idx1 = min(idx1, len(meas) - 1)
+        idx2 = max(idx2, idx1 + 1)      # at least the nearest sample
         if cbox1.pik_pik_bx:
             if calc_values:
-                cYY.c1.y = max(ax_line)
-                cYY.c2.y = min(ax_line)
+                # min/max pyramid of the line - no slicing
+                vmin, vmax = meas.min_max(idx1, idx2)
+                cYY.c1.y = vmax
+                cYY.c2.y = vmin
             else:
                 cYY.c1.y = 0
                 cYY.c2.y = 0
             cYY.update_osc()
             cYY.visible = True
+
+        focus[:] = [item]
+        fftV.set_line(meas)
+        histV.set_line(meas)
+        tik_tik()
+        meas_readout()
+
+
+    meas_txt = TextFrame(0.02, 0.03, '', ax=ax, picker=True, visible=False,
+                         fontsize=9, fontfamily='monospace',
+                         bbox=dict(fc='white', edgecolor='darkgreen'))
+
+    focus = []    # legend item picked last
+
+    def meas_readout():
+        """
+        statistics of the focused line between cXX cursors
+
+        it's cXX addfunc too, so it's live while dragging
+        """
+        txt = []
+        if len(focus) > 0 and cXX.in_win:
+            meas = legV.measure(focus[0], cXX.c1.x, cXX.c2.x)
+            i1, i2 = cXX.window(meas.line)
+            if cXX.razem:
+                # both cursors move - the window slides by a few samples
+                meas = meas.sliding
+            if i2 > i1:
+                if cbox1.rms_bx:
+                    txt.append('RMS    = {:.4f}'.format(meas.rms(i1, i2)))
+                if cbox1.std_bx:
+                    txt.append('rms≈   = {:.4f}'.format(meas.std(i1, i2)))
+                if cbox1.mean_bx:
+                    txt.append('mean   = {:.4f}'.format(meas.mean(i1, i2)))
+                if cbox1.integr_bx:
+                    txt.append('integr = {:.4f}'.format(meas.integral(i1, i2)))
+                if cbox1.lin_fit_bx:
+                    txt.append('a·x+b  = {:.4f}·x{:+.4f}'.format(*meas.lin_fit(i1, i2)))
+                if cbox1.pik_pik_bx and cYY.visible:
+                    # cYY follows the peaks while cXX is dragged
+                    vmin, vmax = meas.min_max(i1, i2)
+                    cYY.c1.y = vmax
+                    cYY.c2.y = vmin
+                    cYY.update_osc()
+        meas_txt.set(text='\n'.join(txt), visible=len(txt) > 0)
+
+
+    def tik_tik():
+        """
+        tik-tik of the focused line
+
+        Y -> X - cXX jumps to the first two crossings of the cYY.c1 level
+                 in the view, so ∆x is the period
+        X -> Y - cYY shows the line values at cXX cursors
+        """
+        if not cbox1.tik_tik_bx or len(focus) == 0:
+            return
+        if lvbox.y2x:
+            slope = 'falling' if lvbox.Level_20 else 'rising'
+            xs, xe = ax.get_xlim()
+            meas = legV.measure(focus[0], xs, xe)
+            t = meas.next_crossings(cYY.c1.y, xs, 2, slope)
+            if len(t) == 2 and t[1] <= xe:
+                cXX.c1.x, cXX.c2.x = t
+                cXX.update_osc()
+        elif lvbox.x2y:
+            meas = legV.measure(focus[0], cXX.c1.x, cXX.c2.x)
+            cYY.c1.y = meas.value_at(cXX.c1.x)
+            cYY.c2.y = meas.value_at(cXX.c2.x)
+            cYY.update_osc()
+
+    def cXX_moved():
+        if lvbox.x2y:
+            tik_tik()
+        meas_readout()
+        fftV.update()
+        histV.update()
+
+    def cYY_moved():
+        if lvbox.y2x:
+            tik_tik()
+        trigger.level = cYY.c1.y
+        meas_readout()
+        fftV.update()
+        histV.update()
             
 
 ############################  flying content example  #############################
@@ -2008,6 +2487,51 @@ if __name__ == "__main__":
     # position or label name
     legV.set_focus(2, 's4')
 
+    # spectrum between cXX cursors, on with 'fft-dB'
+    fftV = FFTView(ax, cXX)
+    # histogram between cXX cursors, on with 'histN'
+    histV = HistView(ax, cXX)
+
+    cXX.set_addfunc(cXX_moved)
+    cYY.set_addfunc(cYY_moved)
+    BlitLayer.of(fig).add(meas_txt.artist)   # redrawn with the cursors
+
+    # live mode - 'm' feeds s1 from a simulated acquisition, 100 samples/s
+    ring = RingBuffer(len(t))
+    ring.extend(s1)
+    live = LiveStream([legV.ax_lines[0]], ring, dx=dt)
+    live.set_addfunc(cXX_moved)    # readouts follow the live data
+
+    def live_on_off(event):
+        if live.running:
+            live.stop()
+        else:
+            live.start(SignalSource(rate=1/dt, block=5, freq=0.5, seed=1))
+
+    EventRouter.of(fig).connect('key_press_event', live_on_off, 'm')
+
+    # 't' - triggered at the cYY.c1 level, rising edge, 1 s before the trigger
+    trigger = Trigger(len(t), level=cYY.c1.y, slope='rising', pre=100)
+
+    def trigger_on_off(event):
+        live.set_trigger(None if live.trigger is not None else trigger)
+
+    EventRouter.of(fig).connect('key_press_event', trigger_on_off, 't')
+
+    # the triggered sweeps: 'n' - mean of 16, 'i' - persistence image
+    def average_on_off(event):
+        live.set_average(None if live.average is not None else 16)
+
+    def persistence_on_off(event):
+        if live.persistence is not None:
+            live.set_persistence(None)
+        else:
+            ax1 = legV.ax_lines[0].axes
+            live.set_persistence(Persistence(ax1, len(t), dx=dt, cmap='magma'))
+
+    EventRouter.of(fig).connect('key_press_event', average_on_off, 'n')
+    EventRouter.of(fig).connect('key_press_event', persistence_on_off, 'i')
+
     #fig_blk_kolor = '#15191C'
     #ax_blk_facecolor = '#20262B'
 